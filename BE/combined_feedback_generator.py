@@ -74,6 +74,9 @@ def _build_combined_prompt(video_result: Dict[str, Any], stt_result: Dict[str, A
     long_pause_count = voice_analysis.get("long_pause_count")
     hesitation = voice_analysis.get("hesitation_count") or stt_result.get("hesitationCount")
     filler = voice_analysis.get("filler_count") or stt_result.get("fillerCount")
+    prosody = voice_analysis.get("prosody") or {}
+    loudness = prosody.get("loudness_db") or {}
+    pitch = prosody.get("pitch_hz") or {}
     
     summary_script = (
         stt_result.get("full_text")
@@ -126,6 +129,9 @@ def _build_combined_prompt(video_result: Dict[str, Any], stt_result: Dict[str, A
     • 긴 침묵 횟수: {long_pause_count}회
     • 주저함(Hesitation): {hesitation}회
     • 군더더기 말(Filler): {filler}회
+    • 음량 변화 폭(dynamic_range): {loudness.get('dynamic_range')}dB
+    • 억양 변화 폭(pitch std): {pitch.get('std_semitones')}반음, 중앙 음높이 {pitch.get('median')}Hz
+    • 유성음 비율(voiced_ratio): {prosody.get('voiced_ratio')}
     • 발화 요약: {summary_script}...
 
     --- 작성 규칙 ---
@@ -2,21 +2,29 @@ from pathlib import Path
 from datetime import datetime
 import math
 from functools import partial
+from typing import Optional
 from fastapi import FastAPI, UploadFile, File, Form, Body
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os, asyncio, json, shutil
 import numpy as np
 
-from video_analyzer import analyze_video, set_progress, get_progress
+from video_analyzer import analyze_video, set_progress, get_progress, warm_up_graph_pool, rescore_timeline
 from stt_processor import (
-    extract_audio,
-    whisper_transcribe,
+    prepare_audio_input,
+    transcribe_to_channel,
+    read_stt_channel,
+    get_stt_cache_stats,
+    compact_stt_result,
+    get_stt_model_stats,
+    preload_stt_models,
+    resolve_stt_model_size,
     process_single_video,
     get_stt_progress,
     analyze_voice_rhythm_and_patterns,
 )
 
+from resource_planner import apply_thread_plan, get_resource_diagnostics
 from combined_feedback_generator import generate_combined_feedback_report
 from result_summary_api import router as summary_router, _compute_script_similarity
 
@@ -27,6 +35,12 @@ from firebase_admin import credentials, firestore
 FIREBASE_CRED_PATH = os.getenv("FIREBASE_CRED_PATH", "serviceAccountKey.json")
 FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
 GOOGLE_APPLICATION_CREDENTIALS_JSON = os.getenv("GOOGLE_APPLICATION_CREDENTIALS_JSON")
+# 프레임별 랜드마크 타임라인(npz) 저장 위치: {dir}/{user_id}/{project_id}/{presentation_id}.npz
+VIDEO_TIMELINE_DIR = Path(os.getenv("VIDEO_TIMELINE_DIR", "results/timelines"))
+# 타임라인 디렉터리 최대 용량(MB). 넘으면 오래 쓰지 않은 파일부터 지웁니다(0 이하면 제한 없음)
+VIDEO_TIMELINE_MAX_MB = float(os.getenv("VIDEO_TIMELINE_MAX_MB", "2000"))
+# 부분 전사 SSE: 작업 채널이 열리기를 기다리는 최대 시간(초)
+STT_STREAM_WAIT_SEC = float(os.getenv("STT_STREAM_WAIT_SEC", "120"))
 
 
 import base64
@@ -76,6 +90,33 @@ db = _init_firestore()
 app = FastAPI()
 app.include_router(summary_router)
 
+
+@app.on_event("startup")
+def apply_resource_plan():
+    """영상 분석과 STT가 동시에 돌아도 코어를 과할당하지 않도록 엔진별 스레드 수를 먼저 고정합니다."""
+    try:
+        apply_thread_plan()
+    except Exception as e:
+        print(f"⚠️ 스레드 계획 적용 실패: {e}")
+
+
+@app.on_event("startup")
+def warm_up_video_graphs():
+    """첫 요청이 MediaPipe 그래프 초기화를 기다리지 않도록 서버 시작 시 그래프 풀을 준비합니다."""
+    try:
+        warm_up_graph_pool()
+    except Exception as e:
+        print(f"⚠️ MediaPipe 그래프 풀 워밍업 실패: {e}")
+
+
+@app.on_event("startup")
+def preload_stt_engine_models():
+    """첫 요청이 Whisper 모델 다운로드·로딩을 기다리지 않도록 STT_PRELOAD_MODELS를 미리 로딩하고 워밍업합니다."""
+    try:
+        preload_stt_models()
+    except Exception as e:
+        print(f"⚠️ STT 모델 사전 로딩 실패: {e}")
+
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*")
 origin_list = [o.strip() for o in ALLOWED_ORIGINS.split(",") if o.strip()] if ALLOWED_ORIGINS else []
 # 와일드카드(*)일 때는 allow_credentials=False 이어야 CORS 에러를 피할 수 있음
@@ -111,6 +152,40 @@ def save_combined_analysis_file(video_result: dict, stt_result: dict, filename:
     return str(output_path)
 
 
+def _timeline_path(user_id: str, project_id: str, presentation_id: str) -> Path:
+    """랜드마크 타임라인 파일 경로. 경로 조작을 막기 위해 각 ID는 단일 경로 요소여야 합니다."""
+    for part in (user_id, project_id, presentation_id):
+        if not part or part in {".", ".."} or "/" in part or "\\" in part:
+            raise ValueError(f"잘못된 ID입니다: {part!r}")
+    return VIDEO_TIMELINE_DIR / user_id / project_id / f"{presentation_id}.npz"
+
+
+def _prune_timelines(keep: Optional[Path] = None):
+    """타임라인 전체 크기가 VIDEO_TIMELINE_MAX_MB를 넘으면 수정 시각이 오래된 파일부터 지웁니다(keep은 제외)."""
+    if VIDEO_TIMELINE_MAX_MB <= 0:
+        return
+    entries = []
+    for entry in VIDEO_TIMELINE_DIR.rglob("*.npz"):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+    total = sum(size for _, size, _ in entries)
+    limit = VIDEO_TIMELINE_MAX_MB * 1024 * 1024
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= limit:
+            break
+        if keep is not None and entry == keep:
+            continue
+        try:
+            entry.unlink()
+        except OSError:
+            continue
+        total -= size
+        print(f"  🧹 오래된 랜드마크 타임라인 삭제: {entry}")
+
+
 def create_run_dirs(run_id: str):
     base = Path("results") / run_id
     video_dir = base / "video"
@@ -192,13 +267,20 @@ def _sanitize_for_firestore(obj):
 async def analyze_video_api(
     user_id: str = Form(...),  # 로그인된 user ID를 받음
     project_id: str = Form(...),  # 선택된 프로젝트 ID
-    file: UploadFile = File(...)):
+    file: UploadFile = File(...),
+    model_size: Optional[str] = Form(None)):  # STT 모델 크기 (base/small/medium, 기본 WHISPER_MODEL_SIZE)
     """
     업로드된 영상 파일을 분석하여 시선/자세 분석과 음성 분석을 실행하고,
-    진행률은 /analyze/progress 에서 실시간 스트리밍됩니다.
+    진행률은 /analyze/progress 에서, 부분 전사 결과는
+    /analyze/stt/stream?job_id={user_id}/{project_id}/{presentation_id} 에서 실시간 스트리밍됩니다.
     결과는 Firestore에 저장합니다. 저장 위치:
     users/{user_id}/projects/{project_id}/feedback/{presentation_id}
     """
+    try:
+        resolve_stt_model_size(model_size)
+    except ValueError as e:
+        return {"message": f"❌ {e}"}
+
     base_name = os.path.splitext(file.filename)[0]
     temp_dir = f"temp_{user_id}_{base_name}"
     os.makedirs(temp_dir, exist_ok=True)
@@ -213,13 +295,22 @@ async def analyze_video_api(
     print(f"[analyze_video] user_id={user_id}, project_id={project_id}, file={file.filename}")
 
     loop = asyncio.get_event_loop()
+    gaze_task = stt_task = None
 
     try:
-        gaze_task = loop.run_in_executor(None, analyze_video, temp_video_path)
-        await loop.run_in_executor(None, extract_audio, temp_video_path, temp_audio_path)
-        stt_task = loop.run_in_executor(None, whisper_transcribe, temp_audio_path)
+        timeline_path = _timeline_path(user_id, project_id, base_name)
+        gaze_task = loop.run_in_executor(
+            None, partial(analyze_video, temp_video_path, timeline_path=str(timeline_path))
+        )
+        audio_input = await loop.run_in_executor(None, prepare_audio_input, temp_video_path, temp_audio_path)
+        if audio_input is None:
+            raise RuntimeError("오디오 추출에 실패했습니다.")
+        stt_task = loop.run_in_executor(
+            None, transcribe_to_channel, audio_input, f"{user_id}/{project_id}/{base_name}", model_size
+        )
 
         gaze_results = await gaze_task
+        await loop.run_in_executor(None, partial(_prune_timelines, keep=timeline_path))
         stt_results = await stt_task
 
         # 추가 음성 분석(WPM, pause 등) 계산
@@ -292,7 +383,7 @@ async def analyze_video_api(
         created_at_value = existing_data.get("created_at") or firestore.SERVER_TIMESTAMP
 
         payload = {
-            "stt_analysis": stt_results,
+            "stt_analysis": compact_stt_result(stt_results),
             "vision_analysis": gaze_results,
             "original_filename": file.filename,
             "project_id": project_id,
@@ -341,15 +432,25 @@ async def analyze_video_api(
         return {"message": f"분석/저장 실패: {str(e)}"}
 
     finally:
+        # 실행 중인 executor 작업은 취소할 수 없으므로, 임시 파일을 지우기 전에 끝날 때까지 기다림
+        pending = [task for task in (gaze_task, stt_task) if task is not None and not task.done()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
 
 
 @app.post("/analyze/stt")
-async def analyze_speech_api(file: UploadFile = File(...)):
+async def analyze_speech_api(file: UploadFile = File(...), model_size: Optional[str] = Form(None)):
     """
     업로드된 영상에서 오디오를 추출해 Whisper STT 결과를 반환합니다.
+    부분 전사 결과는 /analyze/stt/stream?job_id={파일명(확장자 제외)} 에서 스트리밍됩니다.
+    model_size: Whisper 모델 크기 (STT_MODEL_SIZES 중 하나, 생략 시 기본 모델)
     """
+    try:
+        resolve_stt_model_size(model_size)
+    except ValueError as e:
+        return {"message": f"❌ {e}"}
     temp_path = Path(f"temp_stt_{file.filename}")
     contents = await file.read()
     temp_path.write_bytes(contents)
@@ -358,7 +459,13 @@ async def analyze_speech_api(file: UploadFile = File(...)):
     try:
         stt_result = await loop.run_in_executor(
             None,
-            partial(process_single_video, temp_path, output_basename=Path(file.filename).stem)
+            partial(
+                process_single_video,
+                temp_path,
+                output_basename=Path(file.filename).stem,
+                job_id=Path(file.filename).stem,
+                model_size=model_size,
+            )
         )
     finally:
         if temp_path.exists():
@@ -368,10 +475,15 @@ async def analyze_speech_api(file: UploadFile = File(...)):
 
 
 @app.post("/analyze/upload-feedback")
-async def analyze_upload_feedback_api(file: UploadFile = File(...)):
+async def analyze_upload_feedback_api(file: UploadFile = File(...), model_size: Optional[str] = Form(None)):
     """
     영상·음성 동시 분석 후 OpenRouter LLM으로 통합 피드백까지 생성합니다.
+    model_size: Whisper 모델 크기 (STT_MODEL_SIZES 중 하나, 생략 시 기본 모델)
     """
+    try:
+        resolve_stt_model_size(model_size)
+    except ValueError as e:
+        return {"message": f"❌ {e}"}
     original_filename = file.filename
     run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
     base_dir, video_dir, audio_dir, combined_dir = create_run_dirs(run_id)
@@ -386,9 +498,12 @@ async def analyze_upload_feedback_api(file: UploadFile = File(...)):
         output_audio_dir=audio_dir,
         output_json_dir=audio_dir,
         upload_to_firebase=False,  # 통합 API에서는 바로 피드백만 반환
+        job_id=Path(original_filename).stem,
+        model_size=model_size,
     )
 
     try:
+        # 재채점(/analyze/video/rescore)은 /analyze/video 경로의 타임라인만 읽으므로 여기서는 저장하지 않음
         video_task = loop.run_in_executor(None, analyze_video, str(temp_path))
         stt_task = loop.run_in_executor(None, stt_callable)
         video_result, stt_result = await asyncio.gather(video_task, stt_task)
@@ -420,12 +535,88 @@ async def analyze_upload_feedback_api(file: UploadFile = File(...)):
     }
 
 
+@app.post("/analyze/video/rescore")
+def rescore_video_api(data: dict = Body(...)):
+    """
+    저장된 랜드마크 타임라인으로 영상을 다시 디코딩하지 않고 시선/자세/제스처/손/머리 지표를 재계산합니다.
+    body: user_id, project_id, presentation_id, thresholds(선택, DEFAULT_THRESHOLDS 중 덮어쓸 값)
+    """
+    user_id = data.get("user_id")
+    project_id = data.get("project_id") or data.get("projectId")
+    presentation_id = data.get("presentation_id")
+    if not (user_id and project_id and presentation_id):
+        return {"message": "❌ 'user_id', 'project_id', 'presentation_id'가 필요합니다."}
+
+    try:
+        timeline_path = _timeline_path(user_id, project_id, presentation_id)
+        if not timeline_path.exists():
+            return {"message": "❌ 저장된 랜드마크 타임라인이 없습니다. 영상을 다시 분석해 주세요."}
+        result = rescore_timeline(timeline_path, data.get("thresholds"))
+        os.utime(timeline_path)  # 재채점에 쓴 타임라인은 정리 순서에서 뒤로 미룹니다
+    except (ValueError, OSError) as e:
+        return {"message": f"❌ 재채점 실패: {e}"}
+
+    return {
+        "message": "✅ 타임라인 재채점 완료",
+        "presentation_id": presentation_id,
+        "video_result": _sanitize_for_firestore(result),
+    }
+
+
 @app.get("/analyze/stt/progress")
 def stt_progress_api():
     """STT 처리 단계 및 진행률 조회."""
     return get_stt_progress()
 
 
+@app.get("/analyze/stt/models")
+def stt_models_api():
+    """로딩된 STT 모델별 로딩 시간·메모리 증가량(MB)·워밍업 시간 조회."""
+    return get_stt_model_stats()
+
+
+@app.get("/analyze/stt/cache")
+def stt_cache_api():
+    """전사 결과 캐시 적중/미스 횟수와 사용 용량 조회."""
+    return get_stt_cache_stats()
+
+
+@app.get("/analyze/resources")
+def resources_api():
+    """감지한 CPU 코어·cgroup 쿼터, 영상/STT 스레드 계획과 실제 적용된 스레드 수 조회."""
+    return get_resource_diagnostics()
+
+
+@app.get("/analyze/stt/stream")
+async def stt_stream_api(job_id: str, cursor: int = 0):
+    """
+    작업별 부분 전사 결과와 진행률을 SSE로 스트리밍합니다. 새 세그먼트(text, start, end, words)가 도착하거나
+    이 작업의 진행률(progress, stage)이 바뀔 때마다 전송하고
+    전사가 끝나면 done=true 이벤트 후 종료합니다. 재연결 시 마지막으로 받은 cursor를 넘기면 이어서 받습니다.
+    """
+    async def event_generator():
+        position = cursor
+        waited = 0.0
+        last_progress = None
+        while True:
+            state = read_stt_channel(job_id, position)
+            if state is None:
+                # 전사가 아직 시작되지 않음 (업로드/오디오 추출 중)
+                if waited >= STT_STREAM_WAIT_SEC:
+                    yield f"data: {json.dumps({'error': 'unknown job_id', 'done': True})}\n\n"
+                    break
+            elif state["segments"] or state["done"] or state["progress"] != last_progress:
+                position = state["cursor"]
+                last_progress = state["progress"]
+                yield f"data: {json.dumps(state, ensure_ascii=False)}\n\n"
+                if state["done"]:
+                    break
+            await asyncio.sleep(0.5)
+            waited += 0.5
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
 @app.get("/analyze/progress")
 async def get_progress_stream():
     """
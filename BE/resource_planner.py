@@ -0,0 +1,148 @@
+import os
+import math
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import cv2
+from dotenv import load_dotenv
+
+try:
+    import torch
+except ImportError:  # pragma: no cover - optional dep
+    torch = None
+
+load_dotenv()
+
+# ------------------------------------
+# 📌 환경 변수 기반 설정값
+# ------------------------------------
+# 사용할 CPU 코어 수 상한. 0이면 os.cpu_count / CPU affinity / cgroup 쿼터 중 가장 작은 값을 사용
+RESOURCE_CPU_LIMIT = int(os.getenv("RESOURCE_CPU_LIMIT", "0"))
+# 동시에 처리할 분석 작업(영상+음성) 수. 작업 하나당 코어 = 전체 코어 / 이 값
+RESOURCE_CONCURRENT_JOBS = max(1, int(os.getenv("RESOURCE_CONCURRENT_JOBS", "1")))
+# 작업 하나의 코어 중 영상 분석(OpenCV·MediaPipe)에 줄 비율. 나머지는 STT(CTranslate2/torch)
+RESOURCE_VISION_SHARE = min(0.9, max(0.1, float(os.getenv("RESOURCE_VISION_SHARE", "0.5"))))
+
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+_thread_plan: Optional[Dict[str, Any]] = None
+_applied: Dict[str, Any] = {}
+_plan_lock = threading.Lock()
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """컨테이너 CPU 쿼터(코어 수)를 읽습니다. 제한이 없거나 읽을 수 없으면 None."""
+    try:
+        cpu_max = _CGROUP_ROOT / "cpu.max"  # cgroup v2: "<quota> <period>" 또는 "max <period>"
+        if cpu_max.exists():
+            quota, period = cpu_max.read_text().split()[:2]
+            if quota == "max":
+                return None
+            return int(quota) / int(period)
+        quota_path = _CGROUP_ROOT / "cpu" / "cpu.cfs_quota_us"  # cgroup v1
+        period_path = _CGROUP_ROOT / "cpu" / "cpu.cfs_period_us"
+        if quota_path.exists() and period_path.exists():
+            quota = int(quota_path.read_text())
+            if quota <= 0:
+                return None
+            return quota / int(period_path.read_text())
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def detect_cpus() -> Dict[str, Any]:
+    """CPU 코어 수, 이 프로세스에 허용된 코어(affinity), cgroup 쿼터를 읽어 실제로 쓸 코어 수를 정합니다."""
+    os_count = os.cpu_count() or 1
+    affinity = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    quota = _cgroup_cpu_quota()
+
+    candidates = [os_count]
+    if affinity:
+        candidates.append(affinity)
+    if quota:
+        # 쿼터 1.5코어면 1코어로 계산 (스레드가 쿼터를 넘으면 스로틀링됨)
+        candidates.append(max(1, math.floor(quota)))
+    if RESOURCE_CPU_LIMIT > 0:
+        candidates.append(RESOURCE_CPU_LIMIT)
+
+    return {
+        "os_cpu_count": os_count,
+        "affinity": affinity,
+        "cgroup_quota": round(quota, 2) if quota else None,
+        "limit_override": RESOURCE_CPU_LIMIT or None,
+        "effective": min(candidates),
+    }
+
+
+def plan_threads(cpus: Optional[int] = None, jobs: Optional[int] = None, vision_share: Optional[float] = None) -> Dict[str, Any]:
+    """
+    작업 하나당 코어를 영상 분석과 STT에 나눠 각 엔진의 스레드 수를 정합니다.
+    vision.threads: OpenCV 스레드 수이자 구간 병렬 분석 시 최대 워커 수
+    stt.cpu_threads / stt.num_workers: faster-whisper 모델 인자 (num_workers = 동시 작업 수)
+    stt.torch_threads: openai-whisper(torch) 스레드 수
+    코어가 작업당 2개 미만이면 엔진마다 1스레드로 두며 이때는 과할당을 피할 수 없습니다.
+    """
+    cpus = cpus or detect_cpus()["effective"]
+    jobs = jobs or RESOURCE_CONCURRENT_JOBS
+    share = RESOURCE_VISION_SHARE if vision_share is None else vision_share
+
+    per_job = max(1, cpus // jobs)
+    vision = min(per_job - 1, max(1, round(per_job * share))) if per_job > 1 else 1
+    stt = max(1, per_job - vision)
+
+    return {
+        "cpus": cpus,
+        "concurrent_jobs": jobs,
+        "cores_per_job": per_job,
+        "oversubscribed": per_job < 2,
+        "vision": {"threads": vision},
+        "stt": {"cpu_threads": stt, "num_workers": jobs, "torch_threads": stt},
+    }
+
+
+def get_thread_plan() -> Dict[str, Any]:
+    """프로세스에서 공유하는 스레드 계획 (처음 호출 시 한 번 계산)."""
+    global _thread_plan
+    with _plan_lock:
+        if _thread_plan is None:
+            _thread_plan = plan_threads()
+        return _thread_plan
+
+
+def apply_thread_plan(plan: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    프로세스 전역 스레드 풀에 계획을 적용합니다 (cv2.setNumThreads, torch.set_num_threads).
+    faster-whisper는 모델 로딩 시 stt.cpu_threads/num_workers를 인자로 받고,
+    MediaPipe 그래프는 스레드 수를 노출하지 않으므로 VIDEO_GRAPH_POOL_SIZE로 동시 실행 수만 제한됩니다.
+    """
+    plan = plan or get_thread_plan()
+    cv2.setNumThreads(plan["vision"]["threads"])
+    _applied["opencv_threads"] = cv2.getNumThreads()
+    if torch is not None:
+        torch.set_num_threads(plan["stt"]["torch_threads"])
+        _applied["torch_threads"] = torch.get_num_threads()
+    print(
+        f"🧮 스레드 계획 적용: 코어 {plan['cpus']}개, 작업 {plan['concurrent_jobs']}개 동시 "
+        f"→ 영상 {plan['vision']['threads']} / STT {plan['stt']['cpu_threads']} 스레드"
+    )
+    return dict(_applied)
+
+
+def _os_thread_count() -> Optional[int]:
+    task_dir = Path("/proc/self/task")
+    return len(os.listdir(task_dir)) if task_dir.exists() else None
+
+
+def get_resource_diagnostics() -> Dict[str, Any]:
+    """감지한 CPU 자원, 스레드 계획, 실제 적용값과 현재 OS 스레드 수를 반환합니다."""
+    live = {"opencv_threads": cv2.getNumThreads(), "os_threads": _os_thread_count()}
+    if torch is not None:
+        live["torch_threads"] = torch.get_num_threads()
+    return {
+        "cpu": detect_cpus(),
+        "plan": get_thread_plan(),
+        "applied": dict(_applied),
+        "live": live,
+    }
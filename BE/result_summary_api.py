@@ -110,6 +110,33 @@ def _as_list(val: Any) -> list:
     return [val]
 
 
+def _expand_words(stt: Dict[str, Any]) -> Optional[list]:
+    """프론트 expandWords와 동일: words 목록이 없으면 word_timeline(열 지향)을 단어 목록으로 펼칩니다."""
+    if isinstance(stt.get("words"), list):
+        return stt["words"]
+    timeline = stt.get("word_timeline")
+    if not isinstance(timeline, dict) or not isinstance(timeline.get("text_idx"), list):
+        return None
+    vocab = timeline.get("vocab") or []
+
+    def column(name: str) -> list:
+        return timeline.get(name) or []
+
+    def at(values: list, i: int):
+        return values[i] if i < len(values) else None
+
+    starts, ends, probs = column("start"), column("end"), column("probability")
+    return [
+        {
+            "word": vocab[idx] if isinstance(idx, int) and 0 <= idx < len(vocab) else "",
+            "start": at(starts, i),
+            "end": at(ends, i),
+            "probability": at(probs, i),
+        }
+        for i, idx in enumerate(timeline["text_idx"])
+    ]
+
+
 def _compute_script_similarity(script_text: Optional[str], spoken_text: Optional[str]):
     """대본과 발화 텍스트 유사도를 OpenAI LLM으로 계산."""
     if not script_text or not spoken_text:
@@ -212,14 +239,15 @@ def _normalize_payload(raw: Dict[str, Any]) -> Dict[str, Any]:
         or _to_number(data.get("duration"))
         or 0
     )
-    pause_events = voice.get("pause_events") or stt.get("pause_events") or stt.get("words") or []
+    words = _expand_words(stt)
+    pause_events = voice.get("pause_events") or stt.get("pause_events") or words or []
     word_count = _to_number(stt.get("word_count"))
     computed_wpm = (
         _to_number(voice.get("wpm"))
         or _to_number(stt.get("wordsPerMinute"))
         or _to_number(stt.get("wpm"))
         or (word_count and duration_sec and round((word_count / duration_sec) * 60))
-        or (isinstance(stt.get("words"), list) and duration_sec and round((len(stt["words"]) / duration_sec) * 60))
+        or (words is not None and duration_sec and round((len(words) / duration_sec) * 60))
         or 0
     )
 
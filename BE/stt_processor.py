@@ -1,7 +1,21 @@
 import os
+import re
 import json
+import time
+import wave
+import hashlib
+import queue
+import shutil
+import subprocess
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Union
+
+import numpy as np
 
 os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
 
@@ -14,9 +28,14 @@ from dotenv import load_dotenv
 from openai import OpenAI
 
 try:
-    from faster_whisper import WhisperModel as FasterWhisperModel
+    from faster_whisper import WhisperModel as FasterWhisperModel, decode_audio
+    from faster_whisper.tokenizer import Tokenizer as FasterTokenizer
+    from faster_whisper.transcribe import get_compression_ratio, get_ctranslate2_storage, merge_punctuations
 except ImportError:  # pragma: no cover - optional dep
     FasterWhisperModel = None
+    decode_audio = None
+
+from resource_planner import detect_cpus, get_thread_plan
 
 load_dotenv()
 
@@ -39,7 +58,60 @@ if STT_ENGINE not in {"faster", "openai"}:
     STT_ENGINE = "faster"
 WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto").lower()
 FASTER_WHISPER_COMPUTE_TYPE = os.getenv("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+# 요청별로 고를 수 있는 모델 크기 (한 번 로딩한 모델은 레지스트리에 남아 재사용)
+STT_MODEL_SIZES = [s.strip() for s in os.getenv("STT_MODEL_SIZES", "base,small,medium").split(",") if s.strip()]
+# 서버 시작 시 미리 로딩할 모델 "엔진:크기" 목록 (예: "faster:base,openai:base" → faster 실패 시 폴백 모델까지 준비)
+# 비워 두면 STT_ENGINE:WHISPER_MODEL_SIZE 하나만 로딩
+STT_PRELOAD_MODELS = os.getenv("STT_PRELOAD_MODELS", "")
+STT_WARMUP = os.getenv("STT_WARMUP", "true").lower() in {"1", "true", "yes", "on"}
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "ko")
+STT_BEAM_SIZE = int(os.getenv("STT_BEAM_SIZE", "5"))
+# 전사 결과 캐시: 디코딩된 PCM 해시 + 엔진/모델/언어/빔 설정을 키로 디스크에 저장. 0MB면 사용 안 함
+STT_CACHE_DIR = Path(os.getenv("STT_CACHE_DIR", BASE_DIR / "results/stt_cache"))
+STT_CACHE_MAX_MB = float(os.getenv("STT_CACHE_MAX_MB", "500"))
 PAUSE_THRESHOLD_SEC = float(os.getenv("PAUSE_THRESHOLD_SEC", "2.0"))
+PAUSE_HISTOGRAM_EDGES = [0.0, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0]  # 단어 사이 무음 길이 분포 구간(초, 0.2초 미만은 제외), 마지막 구간은 5초 이상
+# 오디오 추출 방식: memory(ffmpeg → 16kHz mono float32 PCM 배열, 디스크 미사용) / wav(moviepy로 WAV 저장 후 전사)
+STT_AUDIO_MODE = os.getenv("STT_AUDIO_MODE", "memory").lower()
+if STT_AUDIO_MODE not in {"memory", "wav"}:
+    STT_AUDIO_MODE = "memory"
+# memory 모드에서도 WAV 파일을 남길지 여부 (기본: 남기지 않음)
+STT_SAVE_AUDIO = os.getenv("STT_SAVE_AUDIO", "false").lower() in {"1", "true", "yes", "on"}
+SAMPLE_RATE = 16000  # Whisper 입력 샘플레이트
+# 병렬 전사: 2 이상이면 오디오를 무음 지점에서 STT_CHUNK_MAX_SEC 이하 청크로 나눠 워커 프로세스(각자 모델 보유)에서 동시에 전사
+STT_PARALLEL_WORKERS = int(os.getenv("STT_PARALLEL_WORKERS", "1"))
+STT_CHUNK_MAX_SEC = float(os.getenv("STT_CHUNK_MAX_SEC", "60"))
+_VAD_FRAME_SEC = 0.02       # 에너지 계산 프레임 길이
+_VAD_SMOOTH_FRAMES = 15     # 300ms 이동 평균으로 짧은 무음(자음 등)은 무시
+_VAD_SEARCH_FROM = 0.5      # 청크 최대 길이의 이 비율 이후 구간에서 가장 조용한 지점을 자름
+# 요청 간 배치 전사: 2 이상이면 동시에 들어온 작업들의 30초 창을 최대 STT_BATCH_SIZE개씩 모아 한 번에 디코딩
+STT_BATCH_SIZE = int(os.getenv("STT_BATCH_SIZE", "1"))
+STT_BATCH_WAIT_MS = float(os.getenv("STT_BATCH_WAIT_MS", "50"))
+_BATCH_WINDOW_SEC = 30      # Whisper 인코더 입력 길이
+# 배치 디코딩 결과 검증 기준 (faster-whisper transcribe 기본값과 동일)
+_NO_SPEECH_THRESHOLD = 0.6
+_LOG_PROB_THRESHOLD = -1.0
+_COMPRESSION_RATIO_THRESHOLD = 2.4
+_PREPEND_PUNCTUATIONS = "\"'“¿([{-"
+_APPEND_PUNCTUATIONS = "\"'.。,，!！?？:：”)]}、"
+_SENTENCE_END_MARKS = ".。!！?？"
+# 빠른 모드: 단어 타임스탬프(정렬 패스) 없이 세그먼트 단위로만 전사하고, 무음 분석은 PCM 에너지로 대신함
+STT_FAST_MODE = os.getenv("STT_FAST_MODE", "false").lower() in {"1", "true", "yes", "on"}
+STT_FAST_BEAM_SIZE = int(os.getenv("STT_FAST_BEAM_SIZE", "1"))
+_VAD_MIN_SILENCE_SEC = 0.2  # 이보다 짧은 무음은 음절·단어 사이 자연스러운 틈으로 보고 무시
+_VAD_SILENCE_RATIO = 0.25   # dB 기준 배경 소음(10%)과 발화 레벨(95%) 사이 이 비율 아래를 무음으로 판정
+# 운율 특징(음량·음높이·유성음 비율·초당 에너지): 전사용 16kHz PCM에서 청크 단위로 계산해 전사 결과 prosody에 저장하고 voice_analysis.prosody로 노출
+STT_PROSODY = os.getenv("STT_PROSODY", "true").lower() in {"1", "true", "yes", "on"}
+_PROSODY_FRAME = 640         # 40ms 분석 창 (75Hz 음높이의 3주기)
+_PROSODY_HOP = 320           # 20ms 간격
+_PROSODY_FFT = 1024          # 창 길이 + 최대 지연보다 커야 순환 자기상관이 섞이지 않음
+_PROSODY_MIN_HZ, _PROSODY_MAX_HZ = 70.0, 400.0
+_PROSODY_SPEECH_DB = -45.0   # 이보다 작은 프레임은 무음으로 보고 음량·음높이 통계에서 제외
+_PROSODY_VOICING = 0.5       # 정규화 자기상관 최댓값이 이 이상이면 유성음
+_PROSODY_CHUNK_SEC = 10.0
+# 폴더 일괄 처리(process_multiple_videos): 영상 단위 워커 프로세스 수(0 = CPU 코어 수 / 2)와 실패 시 재시도 횟수
+STT_BACKFILL_WORKERS = int(os.getenv("STT_BACKFILL_WORKERS", "0"))
+STT_BACKFILL_RETRIES = int(os.getenv("STT_BACKFILL_RETRIES", "2"))
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # 기본값(None) 시 OpenAI 공식 엔드포인트
@@ -56,11 +128,23 @@ HESITATION_PATTERNS = ["~했는데", "~같아요", "~말이죠", "~라든지", "
 FILLER_WORDS = ["음", "어", "아", "저", "그니까", "그러니까", "뭐", "사실"]
 HESITATION_LIST = ", ".join(HESITATION_PATTERNS)
 FILLER_LIST = ", ".join(FILLER_WORDS)
-
-_WHISPER_MODEL = None
-_FASTER_WHISPER_MODEL = None
+# 추임새·말끝 흐림은 로컬 검출기로 계산. true면 LLM 분석을 추가 정보(llm_patterns)로 함께 요청
+STT_LLM_PATTERNS = os.getenv("STT_LLM_PATTERNS", "false").lower() in {"1", "true", "yes", "on"}
+
+_stt_models: Dict[Tuple[str, str], Any] = {}  # (엔진, 크기) → 로딩된 모델
+_stt_model_info: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_stt_models_lock = threading.Lock()
+_worker_cpu_threads = 0  # 병렬 전사 워커 프로세스에서만 설정 (0 = CTranslate2 기본값)
+_stt_pool: Optional[ProcessPoolExecutor] = None
+_stt_pool_workers = 0
+_stt_pool_lock = threading.Lock()
+_stt_batcher = None
+_stt_batcher_lock = threading.Lock()
+_stt_cache_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_stt_cache_lock = threading.Lock()
 _stt_progress = {"progress": 0, "stage": "idle"}
 _stt_last_logged = {"progress": -1, "stage": ""}
+_stt_progress_log = True  # 일괄 처리 워커에서는 단계별·파일별 로그 대신 부모 프로세스의 집계 진행률만 출력 (경고·오류는 그대로)
 _firestore_client: Optional[firestore.Client] = None
 
 _llm_client: Optional[OpenAI] = None
@@ -103,8 +187,11 @@ def set_stt_progress(progress: Optional[int] = None, stage: Optional[str] = None
         _stt_progress["progress"] = _clamp(progress)
     if stage:
         _stt_progress["stage"] = stage
+    job_id = getattr(_stt_job, "id", None)
+    if job_id is not None:
+        _update_stt_channel(job_id, _stt_progress["progress"], _stt_progress["stage"])
 
-    if (
+    if _stt_progress_log and (
         _stt_progress["progress"] != _stt_last_logged["progress"]
         or _stt_progress["stage"] != _stt_last_logged["stage"]
     ):
@@ -120,6 +207,275 @@ def reset_stt_progress():
     set_stt_progress(0, "idle")
 
 
+# ------------------------------------
+# 부분 전사 결과 채널 (작업별 SSE 구독용)
+# ------------------------------------
+# 전사 스레드가 세그먼트를 추가하고 SSE 핸들러가 cursor 이후분을 읽어 갑니다. 최근 채널만 보관
+_STT_CHANNEL_LIMIT = 32
+_stt_channels: Dict[str, Dict[str, Any]] = {}
+_stt_channels_lock = threading.Lock()
+# 현재 스레드가 전사 중인 job_id. set_stt_progress가 전역 진행률과 함께 이 작업 채널의 진행률도 갱신합니다
+_stt_job = threading.local()
+
+
+def open_stt_channel(job_id: str):
+    with _stt_channels_lock:
+        _stt_channels.pop(job_id, None)
+        _stt_channels[job_id] = {"segments": [], "done": False, "error": None, "progress": 0, "stage": "대기 중"}
+        while len(_stt_channels) > _STT_CHANNEL_LIMIT:
+            _stt_channels.pop(next(iter(_stt_channels)))
+
+
+def publish_stt_segment(job_id: str, segment: Dict[str, Any]):
+    with _stt_channels_lock:
+        channel = _stt_channels.get(job_id)
+        if channel is not None:
+            channel["segments"].append(segment)
+
+
+def _update_stt_channel(job_id: str, progress: int, stage: str):
+    with _stt_channels_lock:
+        channel = _stt_channels.get(job_id)
+        if channel is not None:
+            channel["progress"] = progress
+            channel["stage"] = stage
+
+
+def close_stt_channel(job_id: str, error: Optional[str] = None):
+    with _stt_channels_lock:
+        channel = _stt_channels.get(job_id)
+        if channel is not None:
+            channel["done"] = True
+            channel["error"] = error
+            if error is None:
+                channel["progress"] = 100
+
+
+def read_stt_channel(job_id: str, cursor: int = 0) -> Optional[Dict[str, Any]]:
+    """cursor 이후에 도착한 세그먼트와 다음 cursor, 작업 진행률·단계, 완료 여부를 반환합니다. 채널이 없으면 None."""
+    with _stt_channels_lock:
+        channel = _stt_channels.get(job_id)
+        if channel is None:
+            return None
+        segments = channel["segments"]
+        return {
+            "segments": segments[cursor:],
+            "cursor": len(segments),
+            "progress": channel["progress"],
+            "stage": channel["stage"],
+            "done": channel["done"],
+            "error": channel["error"],
+        }
+
+
+# ------------------------------------
+# 전사 결과 캐시 (같은 오디오 재업로드 시 Whisper 생략)
+# ------------------------------------
+_CACHED_KEYS = ("full_text", "words", "duration_sec", "word_count", "timestamp_mode", "vad_pauses", "prosody")  # 저장 시 words는 word_timeline(열 지향)으로 압축
+
+
+def _stt_cache_key(audio: Union[Path, np.ndarray], model_size: Optional[str] = None) -> Optional[str]:
+    """디코딩된 PCM 샘플과 전사 설정으로 캐시 키를 만듭니다. 캐시를 끈 경우 None."""
+    if STT_CACHE_MAX_MB <= 0:
+        return None
+    digest = hashlib.sha256()
+    if isinstance(audio, np.ndarray):
+        digest.update(b"f32")
+        digest.update(memoryview(np.ascontiguousarray(audio, dtype=np.float32)).cast("B"))
+    else:
+        # WAV 헤더(파일명·메타데이터 차이)는 제외하고 샘플 데이터만 해시
+        digest.update(b"wav")
+        with wave.open(str(audio), "rb") as wav:
+            digest.update(repr(wav.getparams()[:3]).encode())
+            while True:
+                block = wav.readframes(1 << 18)
+                if not block:
+                    break
+                digest.update(block)
+    size = model_size or WHISPER_MODEL_SIZE
+    model = size if STT_ENGINE == "openai" else f"{size}/{FASTER_WHISPER_COMPUTE_TYPE}"
+    if STT_FAST_MODE and STT_ENGINE != "openai":
+        digest.update(f"|{STT_ENGINE}|{model}|{STT_LANGUAGE}|{STT_FAST_BEAM_SIZE}|fast".encode())
+    else:
+        digest.update(f"|{STT_ENGINE}|{model}|{STT_LANGUAGE}|{STT_BEAM_SIZE}".encode())
+    return digest.hexdigest()
+
+
+def load_cached_transcript(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    """캐시 적중 시 전사 결과(full_text/words/duration_sec/word_count)를 반환하고 최근 사용 시각을 갱신합니다."""
+    if key is None:
+        return None
+    path = STT_CACHE_DIR / f"{key}.json"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = expand_stt_result(json.load(f))
+        os.utime(path)  # LRU 순서는 파일 수정 시각으로 관리
+    except (OSError, ValueError):
+        with _stt_cache_lock:
+            _stt_cache_stats["misses"] += 1
+        return None
+    with _stt_cache_lock:
+        _stt_cache_stats["hits"] += 1
+    return cached
+
+
+def store_cached_transcript(key: Optional[str], result: Dict[str, Any]):
+    """전사 결과를 캐시에 저장하고, 전체 크기가 STT_CACHE_MAX_MB를 넘으면 오래 쓰지 않은 항목부터 지웁니다."""
+    if key is None:
+        return
+    try:
+        STT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = STT_CACHE_DIR / f"{key}.json"
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(compact_stt_result({k: result[k] for k in _CACHED_KEYS if k in result}), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"  ⚠️ STT 캐시 저장 실패: {e}")
+        return
+
+    with _stt_cache_lock:
+        _stt_cache_stats["stores"] += 1
+        entries = []
+        for entry in STT_CACHE_DIR.glob("*.json"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        limit = STT_CACHE_MAX_MB * 1024 * 1024
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= limit:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+            _stt_cache_stats["evictions"] += 1
+
+
+def get_stt_cache_stats() -> Dict[str, Any]:
+    """캐시 적중/미스/저장/축출 횟수와 현재 항목 수·용량."""
+    with _stt_cache_lock:
+        stats = dict(_stt_cache_stats)
+    sizes = [entry.stat().st_size for entry in STT_CACHE_DIR.glob("*.json")] if STT_CACHE_DIR.exists() else []
+    lookups = stats["hits"] + stats["misses"]
+    stats.update(
+        entries=len(sizes),
+        size_mb=round(sum(sizes) / (1024 * 1024), 2),
+        max_mb=STT_CACHE_MAX_MB,
+        hit_rate=round(stats["hits"] / lookups, 3) if lookups else None,
+    )
+    return stats
+
+
+# ------------------------------------
+# 단어 타임스탬프 열 지향 표현
+# ------------------------------------
+class WordTimeline:
+    """
+    단어 타임스탬프를 열 단위로 보관합니다: start/end/probability는 float 배열(시각이 없으면 NaN),
+    단어 텍스트는 고유 단어 테이블(vocab)과 인덱스 배열(text_idx).
+    to_dict()는 JSON/Firestore에 그대로 저장할 수 있는 형태이고, to_words()는 기존 words(dict 리스트) 호환 뷰입니다.
+    """
+
+    def __init__(self, start, end, probability, vocab: List[str], text_idx):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.probability = np.asarray(probability, dtype=np.float64)
+        self.vocab = list(vocab)
+        self.text_idx = np.asarray(text_idx, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @staticmethod
+    def _column(values) -> np.ndarray:
+        # float 배열로 변환하면 None은 NaN이 됨
+        return np.array(values, dtype=np.float64)
+
+    @classmethod
+    def from_words(cls, words: List[Dict[str, Any]]) -> "WordTimeline":
+        vocab: Dict[str, int] = {}
+        text_idx = [vocab.setdefault(w.get("word", ""), len(vocab)) for w in words]
+        return cls(
+            cls._column([w.get("start") for w in words]),
+            cls._column([w.get("end") for w in words]),
+            cls._column([w.get("probability") for w in words]),
+            list(vocab),
+            text_idx,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WordTimeline":
+        return cls(
+            cls._column(data.get("start", [])),
+            cls._column(data.get("end", [])),
+            cls._column(data.get("probability", [])),
+            data.get("vocab", []),
+            data.get("text_idx", []),
+        )
+
+    @classmethod
+    def from_result(cls, stt_result: Dict[str, Any]) -> "WordTimeline":
+        """열 지향(word_timeline) 또는 기존 words 리스트 중 있는 쪽으로 만듭니다."""
+        if isinstance(stt_result.get("word_timeline"), dict):
+            return cls.from_dict(stt_result["word_timeline"])
+        return cls.from_words(stt_result.get("words") or [])
+
+    @classmethod
+    def times(cls, stt_result: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """열 지향(word_timeline) 또는 기존 words 리스트에서 start/end 배열만 꺼냅니다 (텍스트 테이블은 만들지 않음)."""
+        timeline = stt_result.get("word_timeline")
+        if isinstance(timeline, dict):
+            return cls._column(timeline.get("start", [])), cls._column(timeline.get("end", []))
+        words = stt_result.get("words") or []
+        return cls._column([w.get("start") for w in words]), cls._column([w.get("end") for w in words])
+
+    @staticmethod
+    def _serialize(column: np.ndarray, decimals: int) -> List[Optional[float]]:
+        # NaN은 JSON/Firestore에 저장할 수 없어 None으로 변환
+        values = np.round(column, decimals).astype(object)
+        values[np.isnan(column)] = None
+        return values.tolist()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "start": self._serialize(self.start, 3),
+            "end": self._serialize(self.end, 3),
+            "probability": self._serialize(self.probability, 3),
+            "vocab": self.vocab,
+            "text_idx": self.text_idx.tolist(),
+        }
+
+    def to_words(self) -> List[Dict[str, Any]]:
+        starts, ends, probs = (self._serialize(c, 3) for c in (self.start, self.end, self.probability))
+        return [
+            {"word": self.vocab[i], "start": s, "end": e, "probability": p}
+            for i, s, e, p in zip(self.text_idx.tolist(), starts, ends, probs)
+        ]
+
+
+def compact_stt_result(stt_result: Dict[str, Any]) -> Dict[str, Any]:
+    """저장용 사본: words(dict 리스트)를 열 지향 word_timeline으로 바꿉니다."""
+    if "words" not in stt_result:
+        return stt_result
+    compact = {k: v for k, v in stt_result.items() if k != "words"}
+    compact["word_timeline"] = WordTimeline.from_words(stt_result["words"] or []).to_dict()
+    return compact
+
+
+def expand_stt_result(stt_result: Dict[str, Any]) -> Dict[str, Any]:
+    """compact_stt_result의 역변환: word_timeline만 있으면 기존 소비자를 위한 words 리스트를 복원합니다."""
+    if "words" in stt_result or not isinstance(stt_result.get("word_timeline"), dict):
+        return stt_result
+    expanded = {k: v for k, v in stt_result.items() if k != "word_timeline"}
+    expanded["words"] = WordTimeline.from_dict(stt_result["word_timeline"]).to_words()
+    return expanded
+
+
 # ------------------------------------
 # 1. Firebase 초기화 및 DB 함수
 # ------------------------------------
@@ -172,20 +528,23 @@ def upload_to_firebase_text(user_id: str, file_name: str, stt_data: dict):
     doc_ref = _get_presentation_doc(user_id, file_name)
     if doc_ref is None:
         print("    -> [DB] Firestore 클라이언트를 가져오지 못해 업로드를 건너뜁니다.")
-        return
+        return False
 
+    stt_data = compact_stt_result(stt_data)
     payload = {
         "stt_raw": {
             "full_text": stt_data.get("full_text"),
-            "timestamps": stt_data.get("words"),
+            "timestamps": stt_data.get("word_timeline"),
         },
         "stt_analysis": stt_data,
     }
     try:
         doc_ref.set(payload, merge=True)
         print("    -> [DB] STT 결과 업로드 완료 (Firestore).")
+        return True
     except Exception as e:
         print(f"    -> [DB] Firestore 업로드 실패. 오류: {e}")
+        return False
 
 
 def upload_to_firebase_voice_analysis(user_id: str, file_name: str, analysis_data: dict):
@@ -193,12 +552,14 @@ def upload_to_firebase_voice_analysis(user_id: str, file_name: str, analysis_dat
     doc_ref = _get_presentation_doc(user_id, file_name)
     if doc_ref is None:
         print("    -> [DB] Firestore 클라이언트를 가져오지 못해 업로드를 건너뜁니다.")
-        return
+        return False
     try:
         doc_ref.set({"voice_analysis": analysis_data}, merge=True)
         print("    -> [DB] voice_analysis 업로드 완료 (Firestore).")
+        return True
     except Exception as e:
         print(f"    -> [DB] voice_analysis 업로드 실패: {e}")
+        return False
 
 
 # ------------------------------------
@@ -221,43 +582,213 @@ def extract_audio(video_path: Path, output_audio_path: Path) -> bool:
         return False
 
 
+def _find_ffmpeg() -> Optional[str]:
+    """FFMPEG_BINARY 환경 변수 → PATH → moviepy가 사용하는 imageio-ffmpeg 순으로 ffmpeg를 찾습니다."""
+    path = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def load_audio(video_path: Path) -> Optional[np.ndarray]:
+    """
+    ffmpeg로 영상의 오디오를 16kHz mono float32 PCM으로 디코딩해 NumPy 배열로 반환합니다.
+    WAV 파일을 쓰고 다시 읽지 않으며, 파이프 출력을 미리 할당한 배열에 바로 읽어 들입니다(부족하면 두 배로 확장).
+    실패 시 None.
+    """
+    ffmpeg = _find_ffmpeg()
+    if ffmpeg is None:
+        print("  ⚠️ ffmpeg를 찾을 수 없어 메모리 오디오 추출을 사용할 수 없습니다.")
+        return None
+    cmd = [
+        ffmpeg, "-nostdin", "-v", "error", "-i", str(video_path),
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "f32le", "-",
+    ]
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        print(f"  ❌ 오디오 추출 실패: {e}")
+        return None
+
+    audio = np.empty(SAMPLE_RATE * 60, dtype=np.float32)
+    received = 0  # bytes
+    try:
+        while True:
+            if received == audio.nbytes:
+                grown = np.empty(len(audio) * 2, dtype=np.float32)
+                grown[:len(audio)] = audio
+                audio = grown
+            n = proc.stdout.readinto(memoryview(audio).cast("B")[received:])
+            if not n:
+                break
+            received += n
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+
+    if returncode != 0 or received == 0:
+        print(f"  ❌ 오디오 추출 실패: ffmpeg 종료 코드 {returncode}")
+        return None
+    return audio[:received // 4]
+
+
+def prepare_audio_input(video_path: Path, wav_path: Path, save_wav: bool = False):
+    """
+    STT 입력을 준비합니다. memory 모드이고 save_wav가 아니면 PCM 배열을, 아니면 wav_path에 WAV를 저장하고
+    그 경로를 반환합니다. 메모리 추출에 실패하면 WAV 방식으로 대체하고, 둘 다 실패하면 None.
+    """
+    if STT_AUDIO_MODE == "memory" and not save_wav:
+        audio = load_audio(video_path)
+        if audio is not None:
+            return audio
+        print("  ⚠️ 메모리 오디오 추출 실패, WAV 파일 방식으로 재시도합니다.")
+    if extract_audio(video_path, wav_path):
+        return Path(wav_path)
+    return None
+
+
+def _audio_source(audio: Union[Path, str, np.ndarray]):
+    """Whisper 계열 transcribe()에 넘길 입력. 배열은 그대로, 경로는 문자열로."""
+    return audio if isinstance(audio, np.ndarray) else str(audio)
+
+
 # ------------------------------------
 # 3. Whisper STT 전사 및 분석 자료 생성 함수
 # ------------------------------------
-def get_whisper_model():
-    global _WHISPER_MODEL
-    if _WHISPER_MODEL is None:
-        print(f"  -> [STT] Whisper {WHISPER_MODEL_SIZE} 모델 로딩 중...")
-        _WHISPER_MODEL = whisper.load_model(WHISPER_MODEL_SIZE)
-    return _WHISPER_MODEL
+def resolve_stt_model_size(model_size: Optional[str] = None) -> str:
+    """요청에서 지정한 모델 크기를 검증합니다. 지정하지 않으면 WHISPER_MODEL_SIZE."""
+    if not model_size or model_size == WHISPER_MODEL_SIZE:
+        return WHISPER_MODEL_SIZE
+    if model_size not in STT_MODEL_SIZES:
+        raise ValueError(f"지원하지 않는 모델 크기입니다: {model_size} (허용: {', '.join(STT_MODEL_SIZES)})")
+    return model_size
+
+
+def _rss_mb() -> Optional[float]:
+    """현재 프로세스의 상주 메모리(MB). /proc가 없는 환경에서는 None."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
 
 
-def get_faster_whisper_model():
-    global _FASTER_WHISPER_MODEL
+def _load_stt_model(engine: str, size: str):
+    if engine == "openai":
+        print(f"  -> [STT] Whisper {size} 모델 로딩 중...")
+        return whisper.load_model(size)
     if FasterWhisperModel is None:
         raise RuntimeError("faster-whisper 패키지가 설치되어 있지 않습니다. pip install faster-whisper")
-    if _FASTER_WHISPER_MODEL is None:
-        device = _resolve_device()
-        if device == "mps":
-            print("⚠️ faster-whisper는 MPS를 지원하지 않아 CPU로 대체합니다. (.env에서 WHISPER_DEVICE=cpu 지정 가능)")
-            device = "cpu"
-        print(f"  -> [STT] faster-whisper {WHISPER_MODEL_SIZE} 모델 로딩 중... (device={device}, compute={FASTER_WHISPER_COMPUTE_TYPE})")
-        _FASTER_WHISPER_MODEL = FasterWhisperModel(
-            WHISPER_MODEL_SIZE,
-            device=device,
-            compute_type=FASTER_WHISPER_COMPUTE_TYPE,
-        )
-    return _FASTER_WHISPER_MODEL
+    device = _resolve_device()
+    if device == "mps":
+        print("⚠️ faster-whisper는 MPS를 지원하지 않아 CPU로 대체합니다. (.env에서 WHISPER_DEVICE=cpu 지정 가능)")
+        device = "cpu"
+    # 워커 프로세스는 배정받은 스레드만, 서버 프로세스는 스레드 계획의 STT 몫만 사용
+    stt_plan = get_thread_plan()["stt"]
+    cpu_threads = _worker_cpu_threads or stt_plan["cpu_threads"]
+    num_workers = 1 if _worker_cpu_threads else stt_plan["num_workers"]
+    print(
+        f"  -> [STT] faster-whisper {size} 모델 로딩 중... "
+        f"(device={device}, compute={FASTER_WHISPER_COMPUTE_TYPE}, threads={cpu_threads}x{num_workers})"
+    )
+    return FasterWhisperModel(
+        size,
+        device=device,
+        compute_type=FASTER_WHISPER_COMPUTE_TYPE,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
 
 
-def transcribe_with_openai(audio_path: Path):
-    print(f"  -> [STT] Whisper {WHISPER_MODEL_SIZE} (openai) 모델 로딩 및 전사 중...")
+def get_stt_model(engine: str, size: Optional[str] = None):
+    """
+    (엔진, 크기)별 모델 레지스트리. 처음 요청될 때 한 번만 로딩하고 로딩 시간·메모리 증가량을 기록합니다.
+    engine: "faster" 또는 "openai"
+    """
+    key = (engine, size or WHISPER_MODEL_SIZE)
+    model = _stt_models.get(key)
+    if model is not None:
+        return model
+    with _stt_models_lock:
+        if key not in _stt_models:
+            rss_before = _rss_mb()
+            started = time.perf_counter()
+            _stt_models[key] = _load_stt_model(*key)
+            rss_after = _rss_mb()
+            _stt_model_info[key] = {
+                "engine": key[0],
+                "size": key[1],
+                "load_sec": round(time.perf_counter() - started, 2),
+                "memory_mb": round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None,
+                "warmup_sec": None,
+            }
+        return _stt_models[key]
+
+
+def get_whisper_model(size: Optional[str] = None):
+    return get_stt_model("openai", size)
+
+
+def get_faster_whisper_model(size: Optional[str] = None):
+    return get_stt_model("faster", size)
+
+
+def warm_up_stt_model(engine: str, size: Optional[str] = None) -> float:
+    """1초 무음을 전사해 첫 추론 시의 커널 초기화·메모리 할당 비용을 미리 치릅니다. 소요 시간(초)을 반환."""
+    model = get_stt_model(engine, size)
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    started = time.perf_counter()
+    if engine == "openai":
+        model.transcribe(silence, language=STT_LANGUAGE, word_timestamps=True, verbose=None)
+    else:
+        segments, _ = model.transcribe(silence, language=STT_LANGUAGE, beam_size=STT_BEAM_SIZE, word_timestamps=True)
+        list(segments)
+    elapsed = round(time.perf_counter() - started, 2)
+    _stt_model_info[(engine, size or WHISPER_MODEL_SIZE)]["warmup_sec"] = elapsed
+    return elapsed
+
+
+def preload_stt_models(specs: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    STT_PRELOAD_MODELS("엔진:크기" 쉼표 목록, 엔진 생략 시 STT_ENGINE)의 모델을 미리 로딩하고
+    STT_WARMUP이면 워밍업 추론까지 수행합니다. 실패한 항목은 경고만 남기고 요청 시 다시 로딩을 시도합니다.
+    """
+    spec = STT_PRELOAD_MODELS if specs is None else specs
+    entries = []
+    for item in (part.strip() for part in spec.split(",")):
+        if item:
+            engine, _, size = item.rpartition(":")
+            entries.append((engine or STT_ENGINE, size))
+    for engine, size in entries or [(STT_ENGINE, WHISPER_MODEL_SIZE)]:
+        try:
+            get_stt_model(engine, size)
+            if STT_WARMUP:
+                warm_up_stt_model(engine, size)
+            print(f"  ✅ STT 모델 준비 완료: {engine}:{size} {_stt_model_info[(engine, size)]}")
+        except Exception as e:
+            print(f"  ⚠️ STT 모델 사전 로딩 실패({engine}:{size}): {e}")
+    return get_stt_model_stats()
+
+
+def get_stt_model_stats() -> List[Dict[str, Any]]:
+    """로딩된 모델별 로딩 시간·메모리 증가량(MB)·워밍업 시간."""
+    return [dict(info) for info in _stt_model_info.values()]
+
+
+def transcribe_with_openai(audio: Union[Path, np.ndarray], model_size: Optional[str] = None):
+    if _stt_progress_log:
+        print(f"  -> [STT] Whisper {model_size or WHISPER_MODEL_SIZE} (openai) 모델 로딩 및 전사 중...")
     try:
-        model = get_whisper_model()
+        model = get_whisper_model(model_size)
         set_stt_progress(50, "Whisper 추론 중")
         result = model.transcribe(
-            str(audio_path),
-            language="ko",
+            _audio_source(audio),
+            language=STT_LANGUAGE,
             word_timestamps=True,
             verbose=WHISPER_VERBOSE
         )
@@ -280,7 +811,8 @@ def transcribe_with_openai(audio_path: Path):
             "word_count": len(word_timestamps)
         }
 
-        print("  ✅ STT 전사 완료.")
+        if _stt_progress_log:
+            print("  ✅ STT 전사 완료.")
         set_stt_progress(65, "STT 결과 정리")
         return analysis_data
 
@@ -290,32 +822,56 @@ def transcribe_with_openai(audio_path: Path):
         return None
 
 
-def transcribe_with_faster(audio_path: Path):
+def _segment_to_dict(seg, offset_sec: float = 0.0) -> Dict[str, Any]:
+    """faster-whisper 세그먼트를 (전체 오디오 기준 offset_sec을 더한) 텍스트+단어 타임스탬프 dict로 변환합니다."""
+    return {
+        "start": round(float(seg.start) + offset_sec, 2),
+        "end": round(float(seg.end) + offset_sec, 2),
+        "text": seg.text.strip(),
+        "words": [
+            {
+                "word": word.word.strip(),
+                "start": float(word.start) + offset_sec if word.start is not None else None,
+                "end": float(word.end) + offset_sec if word.end is not None else None,
+                "probability": float(getattr(word, "probability", 0.0))
+            }
+            for word in (seg.words or [])
+        ],
+    }
+
+
+def transcribe_with_faster(audio: Union[Path, np.ndarray], on_segment=None, model_size: Optional[str] = None,
+                           fast: bool = False):
+    """
+    faster-whisper 전사. segments는 지연 생성기이므로 디코딩되는 대로 하나씩 소비하면서
+    진행률(segment.end / 전체 길이)을 갱신하고, on_segment가 있으면 세그먼트(텍스트+단어 타임스탬프)를 바로 전달합니다.
+    fast: 단어 타임스탬프 정렬을 생략하고 STT_FAST_BEAM_SIZE로 디코딩합니다 (words는 비고 word_count는 세그먼트 텍스트 기준).
+    """
     try:
-        model = get_faster_whisper_model()
+        model = get_faster_whisper_model(model_size)
         set_stt_progress(45, "faster-whisper 추론 준비")
         segments, info = model.transcribe(
-            str(audio_path),
-            language="ko",
-            beam_size=5,
-            word_timestamps=True
+            _audio_source(audio),
+            language=STT_LANGUAGE,
+            beam_size=STT_FAST_BEAM_SIZE if fast else STT_BEAM_SIZE,
+            word_timestamps=not fast
         )
-        collected_segments: List[Any] = list(segments)
-        set_stt_progress(55, "faster-whisper 추론 중")
+        total_duration = float(info.duration) if info and info.duration else 0.0
 
-        full_text = " ".join(seg.text.strip() for seg in collected_segments).strip()
+        texts: List[str] = []
         word_timestamps: List[Dict[str, Any]] = []
-        for seg in collected_segments:
-            if seg.words:
-                for word in seg.words:
-                    word_timestamps.append({
-                        "word": word.word.strip(),
-                        "start": float(word.start) if word.start is not None else None,
-                        "end": float(word.end) if word.end is not None else None,
-                        "probability": float(getattr(word, "probability", 0.0))
-                    })
-
-        duration_sec = float(info.duration) if info and info.duration else 0.0
+        for seg in segments:
+            segment = _segment_to_dict(seg)
+            texts.append(segment["text"])
+            word_timestamps.extend(segment["words"])
+
+            if total_duration > 0:
+                set_stt_progress(45 + int(20 * min(1.0, seg.end / total_duration)), "faster-whisper 추론 중")
+            if on_segment is not None:
+                on_segment(segment)
+
+        full_text = " ".join(texts).strip()
+        duration_sec = total_duration
         if not duration_sec and word_timestamps:
             duration_sec = float(word_timestamps[-1].get("end") or 0.0)
 
@@ -323,7 +879,7 @@ def transcribe_with_faster(audio_path: Path):
             "full_text": full_text,
             "words": word_timestamps,
             "duration_sec": duration_sec,
-            "word_count": len(word_timestamps)
+            "word_count": sum(len(text.split()) for text in texts) if fast else len(word_timestamps)
         }
 
         set_stt_progress(65, "STT 결과 정리")
@@ -334,19 +890,737 @@ def transcribe_with_faster(audio_path: Path):
         return None
 
 
-def whisper_transcribe(audio_path: Path):
+# ------------------------------------
+# 3-1. 무음 지점 분할 병렬 전사
+# ------------------------------------
+def _as_pcm(audio: Union[Path, np.ndarray]) -> np.ndarray:
+    """WAV 경로가 들어오면 16kHz PCM 배열로 디코딩합니다."""
+    if isinstance(audio, np.ndarray):
+        return audio
+    if decode_audio is None:
+        raise RuntimeError("faster-whisper 패키지가 설치되어 있지 않습니다. pip install faster-whisper")
+    return decode_audio(str(audio), sampling_rate=SAMPLE_RATE)
+
+
+def _merge_segments(segments: List[Dict[str, Any]], duration_sec: float) -> Dict[str, Any]:
+    """시간 순서의 세그먼트 목록을 transcribe_with_faster와 같은 결과 형식으로 합칩니다."""
+    word_timestamps = [word for segment in segments for word in segment["words"]]
+    return {
+        "full_text": " ".join(segment["text"] for segment in segments).strip(),
+        "words": word_timestamps,
+        "duration_sec": duration_sec,
+        "word_count": len(word_timestamps)
+    }
+
+
+def _frame_energy(audio: np.ndarray) -> np.ndarray:
+    """_VAD_FRAME_SEC(20ms) 프레임별 평균 에너지(샘플 제곱 평균)."""
+    hop = int(_VAD_FRAME_SEC * SAMPLE_RATE)
+    n_frames = len(audio) // hop
+    return np.square(audio[:n_frames * hop].reshape(n_frames, hop)).mean(axis=1)
+
+
+def split_on_silence(audio: np.ndarray, max_chunk_sec: Optional[float] = None) -> List[Tuple[int, int]]:
+    """
+    오디오를 max_chunk_sec 이하 청크의 (시작, 끝) 샘플 구간 목록으로 나눕니다.
+    각 청크는 최대 길이의 뒤쪽 절반에서 단구간 에너지(300ms 평균)가 가장 낮은 지점, 즉 가장 조용한 곳에서 자릅니다.
+    """
+    max_len = int((max_chunk_sec or STT_CHUNK_MAX_SEC) * SAMPLE_RATE)
+    if len(audio) <= max_len:
+        return [(0, len(audio))]
+
+    hop = int(_VAD_FRAME_SEC * SAMPLE_RATE)
+    energy = np.convolve(_frame_energy(audio), np.ones(_VAD_SMOOTH_FRAMES) / _VAD_SMOOTH_FRAMES, mode="same")
+
+    bounds = []
+    start = 0
+    while len(audio) - start > max_len:
+        lo = (start + int(max_len * _VAD_SEARCH_FROM)) // hop
+        hi = (start + max_len) // hop
+        cut = (lo + int(np.argmin(energy[lo:hi]))) * hop
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(audio)))
+    return bounds
+
+
+def _init_stt_worker(cpu_threads: int):
+    """병렬 전사 워커: CPU 스레드 수를 나눠 갖고 모델을 미리 로딩합니다."""
+    global _worker_cpu_threads
+    _worker_cpu_threads = cpu_threads
+    get_faster_whisper_model()
+
+
+def _transcribe_chunk(audio_chunk: np.ndarray, offset_sec: float) -> List[Dict[str, Any]]:
+    """워커 프로세스에서 청크 하나를 전사해 전체 오디오 기준 시각의 세그먼트 목록을 반환합니다."""
+    model = get_faster_whisper_model()
+    segments, _ = model.transcribe(audio_chunk, language=STT_LANGUAGE, beam_size=STT_BEAM_SIZE, word_timestamps=True)
+    return [_segment_to_dict(seg, offset_sec) for seg in segments]
+
+
+def _get_stt_pool(workers: int) -> ProcessPoolExecutor:
+    """모델을 로딩한 워커를 요청 간에 재사용하도록 프로세스 풀을 유지합니다."""
+    global _stt_pool, _stt_pool_workers
+    with _stt_pool_lock:
+        if _stt_pool is None or _stt_pool_workers != workers:
+            if _stt_pool is not None:
+                _stt_pool.shutdown(wait=False)
+            # 스레드 계획의 STT 몫을 워커끼리 나눔 (영상 분석과 동시에 돌아도 과할당하지 않도록)
+            cpu_threads = max(1, get_thread_plan()["stt"]["cpu_threads"] // workers)
+            _stt_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                # fork는 CTranslate2/torch 스레드와 충돌할 수 있어 spawn 사용
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_stt_worker,
+                initargs=(cpu_threads,),
+            )
+            _stt_pool_workers = workers
+        return _stt_pool
+
+
+def _discard_stt_pool(pool: ProcessPoolExecutor):
+    """워커가 죽어 망가진 풀을 닫고, 다음 요청이 새 풀을 만들도록 비웁니다 (다른 요청이 이미 교체했으면 그대로 둠)."""
+    global _stt_pool, _stt_pool_workers
+    with _stt_pool_lock:
+        if _stt_pool is pool:
+            _stt_pool = None
+            _stt_pool_workers = 0
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def transcribe_parallel(audio: Union[Path, np.ndarray], workers: int, on_segment=None):
+    """
+    오디오를 무음 지점에서 나눠 워커 프로세스 풀에서 동시에 전사한 뒤 시간 순서대로 이어 붙입니다.
+    결과 형식은 transcribe_with_faster와 같고, on_segment에는 앞 청크부터 순서대로 세그먼트가 전달됩니다.
+    """
+    try:
+        audio = _as_pcm(audio)
+        chunks = split_on_silence(audio)
+        if len(chunks) == 1:
+            return transcribe_with_faster(audio, on_segment)
+
+        set_stt_progress(45, f"faster-whisper 병렬 추론 ({len(chunks)}개 청크, 워커 {workers}개)")
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(chunks)
+        next_emit = 0
+        done = 0
+        # 워커가 비정상 종료되면 풀을 새로 만들어 아직 끝나지 않은 청크만 한 번 더 시도
+        for attempt in range(2):
+            pool = _get_stt_pool(workers)
+            try:
+                futures = {
+                    pool.submit(_transcribe_chunk, audio[start:end], start / SAMPLE_RATE): i
+                    for i, (start, end) in enumerate(chunks)
+                    if results[i] is None
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    done += 1
+                    # 앞 청크가 모두 끝난 부분까지만 순서대로 내보냄
+                    while next_emit < len(chunks) and results[next_emit] is not None:
+                        if on_segment is not None:
+                            for segment in results[next_emit]:
+                                on_segment(segment)
+                        next_emit += 1
+                    set_stt_progress(45 + int(20 * done / len(chunks)), "faster-whisper 병렬 추론 중")
+                break
+            except BrokenProcessPool:
+                _discard_stt_pool(pool)
+                if attempt:
+                    raise
+                print("  ⚠️ STT 워커 프로세스가 종료되어 풀을 다시 만들고 남은 청크를 재시도합니다.")
+
+        segments = [segment for chunk in results for segment in chunk]
+        analysis_data = _merge_segments(segments, len(audio) / SAMPLE_RATE)
+        set_stt_progress(65, "STT 결과 정리")
+        return analysis_data
+    except Exception as e:
+        print(f"  ❌ faster-whisper 병렬 전사 실패: {e}")
+        set_stt_progress(50, "Whisper 오류")
+        return None
+
+
+# ------------------------------------
+# 3-2. 요청 간 마이크로 배치 전사
+# ------------------------------------
+def _window_segments(tokenizer, tokens: List[int], alignment, tokens_per_second: float,
+                     window_sec: float, offset_sec: float) -> List[Dict[str, Any]]:
+    """
+    타임스탬프 토큰이 섞인 디코딩 결과 하나를 세그먼트로 나누고, 정렬(alignment) 결과로 단어 시각을 붙입니다.
+    단어 분리·시각 계산·문장부호 병합은 faster-whisper의 find_alignment/add_word_timestamps와 같은 방식입니다.
+    """
+    # <|t0|> 텍스트 <|t1|><|t1|> 텍스트 <|t2|> ... 형태를 (시작, 끝, 텍스트 토큰) 목록으로 변환
+    spans = []
+    start, span_tokens = None, []
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            t = (token - tokenizer.timestamp_begin) * 0.02
+            if span_tokens:
+                spans.append((0.0 if start is None else start, t, span_tokens))
+                start, span_tokens = None, []
+            else:
+                start = t
+        elif token < tokenizer.eot:
+            span_tokens.append(token)
+    if span_tokens:
+        spans.append((0.0 if start is None else start, window_sec, span_tokens))
+    if not spans:
+        return []
+
+    text_tokens = [token for _, _, span in spans for token in span]
+    words, word_tokens = tokenizer.split_to_word_tokens(text_tokens + [tokenizer.eot])
+    timings = []
+    if len(word_tokens) > 1:
+        text_indices = np.array([pair[0] for pair in alignment.alignments])
+        time_indices = np.array([pair[1] for pair in alignment.alignments])
+        boundaries = np.pad(np.cumsum([len(t) for t in word_tokens[:-1]]), (1, 0))
+        jumps = np.pad(np.diff(text_indices), (1, 0), constant_values=1).astype(bool)
+        jump_times = time_indices[jumps] / tokens_per_second
+        probs = alignment.text_token_probs
+        timings = [
+            {"word": word, "tokens": word_toks, "start": float(jump_times[i]), "end": float(jump_times[j]),
+             "probability": float(np.mean(probs[i:j]))}
+            for word, word_toks, i, j in zip(words, word_tokens, boundaries[:-1], boundaries[1:])
+        ]
+
+        # 문장 경계의 문장부호·단어가 중앙값의 2배보다 길지 않도록 자름
+        durations = np.array([t["end"] - t["start"] for t in timings])
+        durations = durations[durations.nonzero()]
+        if len(durations) > 0:
+            max_duration = min(0.7, float(np.median(durations))) * 2
+            for i in range(1, len(timings)):
+                if timings[i]["end"] - timings[i]["start"] > max_duration:
+                    if timings[i]["word"] in _SENTENCE_END_MARKS:
+                        timings[i]["end"] = timings[i]["start"] + max_duration
+                    elif timings[i - 1]["word"] in _SENTENCE_END_MARKS:
+                        timings[i]["start"] = timings[i]["end"] - max_duration
+        # "."·"," 등을 앞뒤 단어에 붙여 별도 단어로 세지 않도록 함 (병합된 자리는 빈 문자열로 남음)
+        merge_punctuations(timings, _PREPEND_PUNCTUATIONS, _APPEND_PUNCTUATIONS)
+
+    segments = []
+    word_index = 0
+    for span_start, span_end, span in spans:
+        seg_words = []
+        used = 0
+        # 세그먼트의 텍스트 토큰 수만큼 단어를 앞에서부터 배정 (faster-whisper add_word_timestamps와 동일)
+        while word_index < len(timings) and used < len(span):
+            timing = timings[word_index]
+            if timing["word"].strip():
+                seg_words.append({
+                    "word": timing["word"].strip(),
+                    "start": round(timing["start"], 2) + offset_sec,
+                    "end": round(timing["end"], 2) + offset_sec,
+                    "probability": timing["probability"]
+                })
+            used += len(timing["tokens"])
+            word_index += 1
+        segments.append({
+            "start": round(span_start + offset_sec, 2),
+            "end": round(span_end + offset_sec, 2),
+            "text": tokenizer.decode(span).strip(),
+            "words": seg_words,
+        })
+    return segments
+
+
+def _decode_window_batch(windows: List[np.ndarray], offsets: List[float]) -> List[List[Dict[str, Any]]]:
+    """
+    30초 이하 창 여러 개를 인코더·디코더·정렬 각각 한 번의 배치 호출로 전사합니다.
+    (고정 버전 faster-whisper 1.0.3에는 배치 파이프라인이 없어 CTranslate2 Whisper 배치 API를 직접 사용)
+    faster-whisper와 같은 기준으로 무음 창(no_speech 확률 높고 평균 로그확률 낮음)은 버리고,
+    반복·저신뢰 결과(압축률·평균 로그확률 기준 미달)는 온도 폴백이 있는 일반 경로(_transcribe_chunk)로 다시 전사합니다.
+    """
+    model = get_faster_whisper_model()
+    extractor = model.feature_extractor
+    tokenizer = FasterTokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=STT_LANGUAGE)
+
+    # 모든 창을 Whisper 입력 길이(3000 프레임)로 패딩해 하나의 텐서로 묶음
+    features = np.stack([extractor(window)[:, :extractor.nb_max_frames] for window in windows])
+    num_frames = [min(len(window) // extractor.hop_length, extractor.nb_max_frames) for window in windows]
+    encoder_output = model.model.encode(get_ctranslate2_storage(features.astype(np.float32)))
+    results = model.model.generate(
+        encoder_output,
+        [list(tokenizer.sot_sequence)] * len(windows),
+        beam_size=STT_BEAM_SIZE,
+        max_length=model.max_length,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        max_initial_timestamp_index=int(round(1.0 / model.time_precision)),
+        return_scores=True,
+        return_no_speech_prob=True,
+    )
+    token_lists = []
+    fallback = set()
+    for i, result in enumerate(results):
+        tokens = result.sequences_ids[0]
+        avg_logprob = result.scores[0] * len(tokens) / (len(tokens) + 1)
+        if result.no_speech_prob > _NO_SPEECH_THRESHOLD and avg_logprob < _LOG_PROB_THRESHOLD:
+            tokens = []  # 무음: 환각 텍스트를 버림
+        elif (
+            avg_logprob < _LOG_PROB_THRESHOLD
+            or get_compression_ratio(tokenizer.decode(tokens).strip()) > _COMPRESSION_RATIO_THRESHOLD
+        ):
+            fallback.add(i)
+        token_lists.append(tokens)
+    # align은 빈 토큰열을 받지 못하므로 말소리가 없는 창에는 eot 하나를 넣고 결과는 버림
+    text_tokens = [[token for token in tokens if token < tokenizer.eot] or [tokenizer.eot] for tokens in token_lists]
+    alignments = model.model.align(encoder_output, tokenizer.sot_sequence, text_tokens, num_frames)
+
+    return [
+        _transcribe_chunk(window, offset) if i in fallback
+        else _window_segments(tokenizer, tokens, alignment, model.tokens_per_second, len(window) / SAMPLE_RATE, offset)
+        for i, (tokens, alignment, window, offset) in enumerate(zip(token_lists, alignments, windows, offsets))
+    ]
+
+
+class _STTBatcher:
+    """
+    여러 작업이 제출한 30초 창을 큐에 모아, max_batch개가 차거나 max_wait_sec가 지나면 한 번에 디코딩하는 추론 스레드.
+    모델 호출은 이 스레드에서만 일어나므로 동시 요청이 공유 모델을 번갈아 잡지 않습니다.
+    """
+
+    def __init__(self, max_batch: int, max_wait_sec: float):
+        self.max_batch = max_batch
+        self.max_wait_sec = max_wait_sec
+        self._queue: "queue.Queue[Tuple[np.ndarray, float, Future]]" = queue.Queue()
+        threading.Thread(target=self._run, name="stt-batcher", daemon=True).start()
+
+    def submit(self, window: np.ndarray, offset_sec: float) -> Future:
+        future: Future = Future()
+        self._queue.put((window, offset_sec, future))
+        return future
+
+    def _collect(self) -> List[Tuple[np.ndarray, float, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_sec
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = _decode_window_batch([item[0] for item in batch], [item[1] for item in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, _, future), segments in zip(batch, results):
+                future.set_result(segments)
+
+
+def _get_stt_batcher() -> _STTBatcher:
+    global _stt_batcher
+    with _stt_batcher_lock:
+        if _stt_batcher is None:
+            _stt_batcher = _STTBatcher(STT_BATCH_SIZE, STT_BATCH_WAIT_MS / 1000.0)
+        return _stt_batcher
+
+
+def transcribe_batched(audio: Union[Path, np.ndarray], on_segment=None):
+    """
+    오디오를 무음 지점에서 30초 이하 창으로 나눠 공용 배치 스레드에 제출하고, 결과를 순서대로 이어 붙입니다.
+    동시에 실행 중인 다른 작업의 창과 같은 배치로 묶여 디코딩되며, 결과 형식은 transcribe_with_faster와 같습니다.
+    """
+    try:
+        audio = _as_pcm(audio)
+        windows = split_on_silence(audio, _BATCH_WINDOW_SEC)
+        set_stt_progress(45, f"faster-whisper 배치 추론 대기 ({len(windows)}개 구간)")
+        batcher = _get_stt_batcher()
+        futures = [batcher.submit(audio[start:end], start / SAMPLE_RATE) for start, end in windows]
+
+        segments: List[Dict[str, Any]] = []
+        for done, future in enumerate(futures, start=1):
+            for segment in future.result():
+                segments.append(segment)
+                if on_segment is not None:
+                    on_segment(segment)
+            set_stt_progress(45 + int(20 * done / len(futures)), "faster-whisper 배치 추론 중")
+
+        analysis_data = _merge_segments(segments, len(audio) / SAMPLE_RATE)
+        set_stt_progress(65, "STT 결과 정리")
+        return analysis_data
+    except Exception as e:
+        print(f"  ❌ faster-whisper 배치 전사 실패: {e}")
+        set_stt_progress(50, "Whisper 오류")
+        return None
+
+
+# ------------------------------------
+# 3-3. 빠른 모드 (세그먼트 타임스탬프 + 에너지 기반 무음 분석)
+# ------------------------------------
+def detect_silences(audio: np.ndarray, min_silence_sec: float = _VAD_MIN_SILENCE_SEC) -> np.ndarray:
+    """
+    발화 사이 무음 구간을 (시작초, 끝초) 배열(k×2)로 반환합니다. 첫 발화 이전·마지막 발화 이후는 제외합니다.
+    무음 기준은 녹음마다 다른 배경 소음에 맞춰 프레임 에너지(dB) 분포의 10/95 백분위 사이에서 정합니다.
+    """
+    energy_db = 10.0 * np.log10(_frame_energy(audio) + 1e-10)
+    if energy_db.size == 0:
+        return np.empty((0, 2))
+    noise, speech = np.percentile(energy_db, [10, 95])
+    silent = energy_db < noise + _VAD_SILENCE_RATIO * (speech - noise)
+    voiced = np.flatnonzero(~silent)
+    if voiced.size == 0:
+        return np.empty((0, 2))
+
+    silent = silent[voiced[0]:voiced[-1] + 1]
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = (ends - starts) * _VAD_FRAME_SEC >= min_silence_sec
+    return (np.stack([starts[keep], ends[keep]], axis=1) + voiced[0]) * _VAD_FRAME_SEC
+
+
+def transcribe_fast(audio: Union[Path, np.ndarray], on_segment=None, model_size: Optional[str] = None):
+    """
+    단어 타임스탬프 없이 전사하고, 무음 구간은 PCM 에너지에서 구해 vad_pauses로 붙입니다.
+    analyze_voice_rhythm_and_patterns는 timestamp_mode="segment"인 결과에서 vad_pauses로 무음 지표를 계산합니다.
+    """
+    try:
+        audio = _as_pcm(audio)
+    except Exception as e:
+        print(f"  ❌ 빠른 모드 오디오 디코딩 실패: {e}")
+        return None
+    result = transcribe_with_faster(audio, on_segment, model_size, fast=True)
+    if result:
+        result["timestamp_mode"] = "segment"
+        result["vad_pauses"] = np.round(detect_silences(audio), 2).tolist()
+    return result
+
+
+# ------------------------------------
+# 3-4. 운율(prosody) 특징 추출
+# ------------------------------------
+class _ProsodyAccumulator:
+    """
+    PCM 청크를 받아 20ms 프레임 단위로 음량(RMS dB)·음높이(자기상관)·유성음 여부를 벡터 연산으로 계산하고,
+    결과는 고정 크기 히스토그램과 초당 에너지 합계로만 누적합니다 (초당 타임라인 외에는 길이와 무관한 메모리).
+    """
+
+    _DB_EDGES = np.arange(-100.0, 0.5, 0.5)
+    _HZ_EDGES = np.arange(_PROSODY_MIN_HZ, _PROSODY_MAX_HZ + 1.0, 1.0)
+
+    def __init__(self):
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._window = np.hanning(_PROSODY_FRAME).astype(np.float32)
+        # 창 함수 자체의 자기상관으로 나눠 지연이 길수록 값이 작아지는 편향을 보정
+        window_ac = np.fft.irfft(np.abs(np.fft.rfft(self._window, _PROSODY_FFT)) ** 2)
+        self._lag_lo = int(SAMPLE_RATE / _PROSODY_MAX_HZ)
+        self._lag_hi = int(SAMPLE_RATE / _PROSODY_MIN_HZ)
+        self._window_ac = window_ac[:self._lag_hi + 2] / window_ac[0]
+        self.frames = 0
+        self.speech_frames = 0
+        self.voiced_frames = 0
+        self.db_hist = np.zeros(len(self._DB_EDGES) - 1, dtype=np.int64)
+        self.db_sum = 0.0
+        self.hz_hist = np.zeros(len(self._HZ_EDGES) - 1, dtype=np.int64)
+        self.semitone_sum = 0.0
+        self.semitone_sq = 0.0
+        self.second_energy = np.zeros(0)
+        self.second_frames = np.zeros(0, dtype=np.int64)
+
+    def feed(self, chunk: np.ndarray):
+        buffer = np.concatenate([self._carry, np.asarray(chunk, dtype=np.float32)])
+        if len(buffer) < _PROSODY_FRAME:
+            self._carry = buffer
+            return
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, _PROSODY_FRAME)[::_PROSODY_HOP]
+        consumed = len(frames) * _PROSODY_HOP
+        self._carry = buffer[consumed:].copy()
+
+        energy = np.square(frames).mean(axis=1)
+        db = 10.0 * np.log10(energy + 1e-10)
+        speech = db > _PROSODY_SPEECH_DB
+
+        centered = (frames - frames.mean(axis=1, keepdims=True)) * self._window
+        ac = np.fft.irfft(np.abs(np.fft.rfft(centered, _PROSODY_FFT, axis=1)) ** 2, axis=1)[:, :self._lag_hi + 2]
+        ac = ac / np.maximum(ac[:, :1], 1e-12) / self._window_ac
+        band = ac[:, self._lag_lo:self._lag_hi + 1]
+        peak_val = band.max(axis=1)
+        # 옥타브 오류(2배 지연) 방지: 최댓값의 90% 이상인 첫 구간의 봉우리를 주기로 선택
+        strong = band >= 0.9 * peak_val[:, None]
+        cols = np.arange(band.shape[1])
+        first = np.argmax(strong, axis=1)
+        after = ~strong & (cols > first[:, None])
+        last = np.where(after.any(axis=1), np.argmax(after, axis=1), band.shape[1])
+        run = (cols >= first[:, None]) & (cols < last[:, None])
+        lag = np.argmax(np.where(run, band, -np.inf), axis=1) + self._lag_lo
+        rows = np.arange(len(lag))
+        left, mid, right = ac[rows, lag - 1], ac[rows, lag], ac[rows, lag + 1]
+        denom = left - 2.0 * mid + right
+        offset = np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / np.where(denom == 0, 1.0, denom), 0.0)
+        hz = SAMPLE_RATE / (lag + np.clip(offset, -0.5, 0.5))
+        voiced = speech & (peak_val >= _PROSODY_VOICING)
+
+        seconds = (self.frames + np.arange(len(frames))) * _PROSODY_HOP // SAMPLE_RATE
+        size = int(seconds[-1]) + 1
+        if size > len(self.second_energy):
+            self.second_energy = np.pad(self.second_energy, (0, size - len(self.second_energy)))
+            self.second_frames = np.pad(self.second_frames, (0, size - len(self.second_frames)))
+        self.second_energy += np.bincount(seconds, weights=energy, minlength=size)[:len(self.second_energy)]
+        self.second_frames += np.bincount(seconds, minlength=size)[:len(self.second_frames)]
+
+        self.frames += len(frames)
+        self.speech_frames += int(speech.sum())
+        self.voiced_frames += int(voiced.sum())
+        self.db_hist += np.histogram(db[speech], bins=self._DB_EDGES)[0]
+        self.db_sum += float(db[speech].sum())
+        self.hz_hist += np.histogram(hz[voiced], bins=self._HZ_EDGES)[0]
+        semitones = 12.0 * np.log2(hz[voiced] / 100.0)
+        self.semitone_sum += float(semitones.sum())
+        self.semitone_sq += float(np.square(semitones).sum())
+
+    @staticmethod
+    def _percentiles(hist: np.ndarray, edges: np.ndarray, qs) -> List[Optional[float]]:
+        total = hist.sum()
+        if total == 0:
+            return [None for _ in qs]
+        cdf = np.cumsum(hist) / total
+        centers = (edges[:-1] + edges[1:]) / 2.0
+        return [round(float(centers[min(int(np.searchsorted(cdf, q)), len(centers) - 1)]), 1) for q in qs]
+
+    def summary(self) -> Dict[str, Any]:
+        p10_db, p50_db, p90_db = self._percentiles(self.db_hist, self._DB_EDGES, (0.1, 0.5, 0.9))
+        p10_hz, p50_hz, p90_hz = self._percentiles(self.hz_hist, self._HZ_EDGES, (0.1, 0.5, 0.9))
+        semitone_std = None
+        if self.voiced_frames > 1:
+            mean = self.semitone_sum / self.voiced_frames
+            semitone_std = round(float(np.sqrt(max(self.semitone_sq / self.voiced_frames - mean ** 2, 0.0))), 2)
+        per_second = 10.0 * np.log10(self.second_energy / np.maximum(self.second_frames, 1) + 1e-10)
+        return {
+            "loudness_db": {
+                "mean": round(self.db_sum / self.speech_frames, 1) if self.speech_frames else None,
+                "p10": p10_db,
+                "median": p50_db,
+                "p90": p90_db,
+                "dynamic_range": round(p90_db - p10_db, 1) if p10_db is not None else None,
+            },
+            "pitch_hz": {
+                "median": p50_hz,
+                "p10": p10_hz,
+                "p90": p90_hz,
+                "std_semitones": semitone_std,  # 억양 변화 폭 (반음 단위 표준편차)
+            },
+            "voiced_ratio": round(self.voiced_frames / self.frames, 3) if self.frames else 0.0,
+            "speech_ratio": round(self.speech_frames / self.frames, 3) if self.frames else 0.0,
+            "energy_timeline": {"sec_per_point": 1, "rms_db": np.round(per_second, 1).tolist()},
+        }
+
+
+def _iter_pcm_chunks(audio: Union[Path, np.ndarray], chunk_sec: float = _PROSODY_CHUNK_SEC):
+    """
+    PCM 배열은 구간 뷰로, WAV 경로는 파일에서 청크씩 읽어 16kHz mono float32 [-1, 1] 배열로 내보냅니다.
+    16kHz mono 16-bit가 아닌 WAV(moviepy는 원본 채널 수·샘플레이트로 저장)는 ffmpeg로 다운믹스·리샘플하며 읽습니다.
+    """
+    chunk = int(chunk_sec * SAMPLE_RATE)
+    if isinstance(audio, np.ndarray):
+        for start in range(0, len(audio), chunk):
+            yield audio[start:start + chunk]
+        return
+    try:
+        with wave.open(str(audio), "rb") as wav:
+            if wav.getsampwidth() == 2 and wav.getnchannels() == 1 and wav.getframerate() == SAMPLE_RATE:
+                while True:
+                    block = wav.readframes(chunk)
+                    if not block:
+                        break
+                    yield np.frombuffer(block, dtype="<i2").astype(np.float32) / 32768.0
+                return
+    except wave.Error:
+        pass  # float WAV 등 wave 모듈이 읽지 못하는 형식도 ffmpeg로 처리
+
+    ffmpeg = _find_ffmpeg()
+    if ffmpeg is None:
+        yield from _iter_pcm_chunks(_as_pcm(audio), chunk_sec)
+        return
+    cmd = [ffmpeg, "-nostdin", "-v", "error", "-i", str(audio), "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "f32le", "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    received = 0
+    try:
+        while True:
+            block = proc.stdout.read(chunk * 4)
+            if not block:
+                break
+            received += len(block)
+            yield np.frombuffer(block[:len(block) // 4 * 4], dtype="<f4")
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        returncode = proc.wait()
+    if returncode != 0 and received == 0:
+        raise RuntimeError(f"ffmpeg 오디오 디코딩 실패 (종료 코드 {returncode})")
+
+
+def extract_prosody(audio: Union[Path, np.ndarray]) -> Optional[Dict[str, Any]]:
+    """전사용 16kHz PCM(배열 또는 WAV)에서 음량·음높이·유성음 비율·초당 에너지 타임라인을 계산합니다."""
+    try:
+        started = time.perf_counter()
+        acc = _ProsodyAccumulator()
+        for chunk in _iter_pcm_chunks(audio):
+            acc.feed(chunk)
+        summary = acc.summary()
+        summary["compute_sec"] = round(time.perf_counter() - started, 3)
+        return summary
+    except Exception as e:
+        print(f"  ⚠️ 운율 특징 추출 실패: {e}")
+        return None
+
+
+def whisper_transcribe(audio: Union[Path, np.ndarray], on_segment=None, model_size: Optional[str] = None):
+    """
+    audio: WAV 경로 또는 16kHz mono float32 PCM 배열 (load_audio 결과).
+    on_segment: faster-whisper 사용 시 세그먼트가 디코딩될 때마다 호출됩니다 (openai Whisper는 한 번에 완료되어 미지원).
+    model_size: 요청별 모델 크기 (STT_MODEL_SIZES 중 하나, 기본 WHISPER_MODEL_SIZE).
+        병렬/배치 전사는 기본 크기 모델로만 동작하므로 다른 크기는 단일 전사로 처리합니다.
+    STT_FAST_MODE이면 병렬/배치 설정과 관계없이 transcribe_fast로 전사합니다.
+    """
+    model_size = resolve_stt_model_size(model_size)
+    cache_key = _stt_cache_key(audio, model_size)
+    cached = load_cached_transcript(cache_key)
+    if cached is not None:
+        if _stt_progress_log:
+            print("  ✅ STT 캐시 적중: Whisper 전사를 생략합니다.")
+        set_stt_progress(65, "STT 캐시 적중")
+        if STT_PROSODY and "prosody" not in cached:
+            cached["prosody"] = extract_prosody(audio)
+        if on_segment is not None:
+            on_segment({
+                "start": 0.0,
+                "end": round(float(cached.get("duration_sec") or 0.0), 2),
+                "text": cached.get("full_text", ""),
+                "words": cached.get("words", []),
+            })
+        return cached
+
     if STT_ENGINE == "openai":
-        return transcribe_with_openai(audio_path)
-    result = transcribe_with_faster(audio_path)
-    if result is None:
-        print("⚠️ faster-whisper 실패, 기본 Whisper로 재시도합니다.")
-        return transcribe_with_openai(audio_path)
+        result = transcribe_with_openai(audio, model_size)
+    else:
+        if STT_FAST_MODE:
+            result = transcribe_fast(audio, on_segment, model_size)
+        elif model_size != WHISPER_MODEL_SIZE:
+            result = transcribe_with_faster(audio, on_segment, model_size)
+        elif STT_BATCH_SIZE > 1:
+            result = transcribe_batched(audio, on_segment)
+        elif STT_PARALLEL_WORKERS > 1:
+            result = transcribe_parallel(audio, STT_PARALLEL_WORKERS, on_segment)
+        else:
+            result = transcribe_with_faster(audio, on_segment)
+        if result is None:
+            # 폴백 결과는 설정된 엔진의 결과가 아니므로 캐시하지 않음
+            print("⚠️ faster-whisper 실패, 기본 Whisper로 재시도합니다.")
+            result = transcribe_with_openai(audio, model_size)
+            if result and STT_PROSODY:
+                result["prosody"] = extract_prosody(audio)
+            return result
+    if result:
+        if STT_PROSODY:
+            result["prosody"] = extract_prosody(audio)
+        store_cached_transcript(cache_key, result)
     return result
 
 
+def transcribe_to_channel(audio: Union[Path, np.ndarray], job_id: str, model_size: Optional[str] = None):
+    """whisper_transcribe를 실행하면서 부분 전사 결과와 진행률을 job_id 채널로 내보냅니다."""
+    open_stt_channel(job_id)
+    _stt_job.id = job_id
+    result = None
+    try:
+        result = whisper_transcribe(
+            audio, on_segment=lambda segment: publish_stt_segment(job_id, segment), model_size=model_size
+        )
+        return result
+    finally:
+        _stt_job.id = None
+        close_stt_channel(job_id, None if result else "STT 전사에 실패했습니다.")
+
+
 # ------------------------------------
 # 4. GPT 기반 언어 습관 분석
 # ------------------------------------
+_TOKEN_PUNCTUATION = " \t.,?!~…\"'“”‘’()[]{}:;·-"
+
+
+def _compile_speech_habit_matcher() -> "re.Pattern":
+    """
+    FILLER_WORDS와 HESITATION_PATTERNS를 단어 하나에 대한 정규식 하나로 묶습니다.
+    - 추임새: 단어 전체가 일치 ("아"는 "아" 단독일 때만, "아마"·"아니" 안에서는 세지 않음)
+    - "~"로 시작하는 말끝 흐림: 어미로 끝나는 단어 ("~같아요" → "좋은 것 같아요"의 "같아요")
+    - 그 외 말끝 흐림: 그 말로 시작하는 단어 ("약간", "약간의")
+    """
+    def alternation(items):
+        return "|".join(re.escape(item) for item in sorted(items, key=len, reverse=True))
+
+    endings = [pat[1:] for pat in HESITATION_PATTERNS if pat.startswith("~")]
+    hedges = [pat for pat in HESITATION_PATTERNS if not pat.startswith("~")]
+    branches = [f"(?P<filler>{alternation(FILLER_WORDS)})"]
+    if hedges:
+        branches.append(f"(?P<hedge>{alternation(hedges)}).*")
+    if endings:
+        branches.append(f".*?(?P<ending>{alternation(endings)})")
+    return re.compile("|".join(branches), re.DOTALL)
+
+
+_SPEECH_HABIT_MATCHER = _compile_speech_habit_matcher()
+
+
+def detect_speech_habits(stt_result_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    단어 타임스탬프를 한 번 훑어 추임새·말끝 흐림을 찾습니다 (LLM 호출 없음).
+    정규식은 고유 단어(vocab)마다 한 번만 실행하고, 각 사건의 발생 시각(초)을 함께 반환합니다.
+    text_for_logic_analysis는 추임새를 뺀 전사 텍스트입니다.
+    """
+    timeline = WordTimeline.from_result(stt_result_data)
+    if len(timeline) == 0:
+        # 단어 타임스탬프가 없는 과거 결과는 공백 단위 토큰(시각 없음)으로 대신 검사
+        tokens = (stt_result_data.get("full_text") or "").split()
+        timeline = WordTimeline.from_words([{"word": token} for token in tokens])
+
+    # 고유 단어별 판정: (종류, 패턴 표기, 문장부호를 뗀 단어)
+    verdicts = []
+    for word in timeline.vocab:
+        token = word.strip(_TOKEN_PUNCTUATION)
+        match = _SPEECH_HABIT_MATCHER.fullmatch(token) if token else None
+        if match is None:
+            verdicts.append((None, None, token))
+        elif match.lastgroup == "filler":
+            verdicts.append(("filler", match.group("filler"), token))
+        elif match.lastgroup == "hedge":
+            verdicts.append(("hesitation", match.group("hedge"), token))
+        else:
+            verdicts.append(("hesitation", "~" + match.group("ending"), token))
+    vocab = [word.strip() for word in timeline.vocab]
+
+    events = {"filler": [], "hesitation": []}
+    kept_tokens = []
+    for idx, start in zip(timeline.text_idx.tolist(), timeline.start.tolist()):
+        kind, pattern, token = verdicts[idx]
+        if kind is not None:
+            events[kind].append({
+                "word": token,
+                "pattern": pattern,
+                "start_sec": None if start != start else round(start, 2),  # NaN → None
+            })
+        if kind != "filler" and token:
+            kept_tokens.append(vocab[idx])
+
+    return {
+        "hesitation_count": len(events["hesitation"]),
+        "filler_count": len(events["filler"]),
+        "hesitation_list": [event["word"] for event in events["hesitation"]],
+        "filler_list": [event["word"] for event in events["filler"]],
+        "hesitation_events": events["hesitation"],
+        "filler_events": events["filler"],
+        "text_for_logic_analysis": " ".join(kept_tokens),
+    }
+
+
 def analyze_speech_patterns_with_gpt(full_text: str) -> Dict[str, Any]:
     """LLM(기본: OpenAI, 옵션: OpenRouter)로 말끝 흐림·추임새를 JSON으로 반환."""
     if not full_text:
@@ -378,71 +1652,82 @@ def analyze_speech_patterns_with_gpt(full_text: str) -> Dict[str, Any]:
 
 
 def analyze_voice_rhythm_and_patterns(stt_result_data: dict) -> dict:
-    """WPM/무음/추임새·말끝 분석을 수행합니다."""
-    words = stt_result_data.get('words', [])
+    """
+    WPM/무음/추임새·말끝 분석을 수행합니다. 단어 사이 간격은 열 지향 배열에서 한 번에 계산합니다.
+    빠른 모드 결과(timestamp_mode="segment")는 단어 시각이 없으므로 word_count(세그먼트 텍스트 기준)로 WPM을,
+    vad_pauses(에너지 기반 무음 구간)로 무음 지표를 계산합니다.
+    두 모드의 무음 지표가 같은 기준이 되도록 단어 간격도 VAD와 같이 _VAD_MIN_SILENCE_SEC 이상만 무음으로 셉니다.
+    """
     total_duration = stt_result_data.get('duration_sec', 0.0)
-    word_count = len(words)
+    if stt_result_data.get("timestamp_mode") == "segment":
+        intervals = np.asarray(stt_result_data.get("vad_pauses") or [], dtype=np.float64).reshape(-1, 2)
+        pause_starts, pause_ends = intervals[:, 0], intervals[:, 1]
+        word_count = int(stt_result_data.get("word_count") or 0)
+    else:
+        starts, ends = WordTimeline.times(stt_result_data)
+        # 현재 단어 끝 ~ 다음 단어 시작. 시각이 없는 단어(NaN)는 아래 비교에서 모두 제외됨
+        pause_starts, pause_ends = ends[:-1], starts[1:]
+        word_count = len(starts)
     wpm = round((word_count / total_duration) * 60) if total_duration > 0 else 0
 
-    pause_events: List[Dict] = []
-    all_pause_durations: List[float] = []
-
-    for i in range(len(words) - 1):
-        current_word_end = words[i].get('end', 0.0)
-        next_word_start = words[i+1].get('start', 0.0)
-        gap_duration = next_word_start - current_word_end
-        if gap_duration > 0:
-            all_pause_durations.append(gap_duration)
-        if gap_duration >= PAUSE_THRESHOLD_SEC:
-            pause_events.append({
-                "start_sec": round(current_word_end, 2),
-                "end_sec": round(next_word_start, 2),
-                "duration": round(gap_duration, 2)
-            })
+    gaps = pause_ends - pause_starts
+    pauses = gaps[gaps >= _VAD_MIN_SILENCE_SEC]
+    long_idx = np.flatnonzero(gaps >= PAUSE_THRESHOLD_SEC)
+    pause_events: List[Dict] = [
+        {
+            "start_sec": round(end, 2),
+            "end_sec": round(start, 2),
+            "duration": round(gap, 2)
+        }
+        for end, start, gap in zip(
+            pause_starts[long_idx].tolist(), pause_ends[long_idx].tolist(), gaps[long_idx].tolist()
+        )
+    ]
 
-    total_pause_count = len(all_pause_durations)
-    avg_pause_duration = round(sum(all_pause_durations) / total_pause_count, 2) if total_pause_count > 0 else 0.0
+    total_pause_count = len(pauses)
+    avg_pause_duration = round(float(pauses.sum()) / total_pause_count, 2) if total_pause_count > 0 else 0.0
     long_pause_count = len(pause_events)
+    pause_counts, _ = np.histogram(pauses, bins=PAUSE_HISTOGRAM_EDGES + [np.inf])
     full_text = stt_result_data.get('full_text', '')
 
-    speech_patterns_result = analyze_speech_patterns_with_gpt(full_text)
-
-    # GPT 분석 실패 시 또는 0일 때 Regex 기반 백업 카운팅
-    hesitation_count = speech_patterns_result.get('hesitation_count', 0)
-    filler_count = speech_patterns_result.get('filler_count', 0)
-    
-    if hesitation_count == 0:
-        import re
-        # HESITATION_PATTERNS = ["~했는데", "~같아요", "~말이죠", "~라든지", "~입니다만", "약간", "왠지"]
-        for pat in HESITATION_PATTERNS:
-            # 단순 포함 여부 체크 (정확도를 위해선 형태소 분석이 필요하나 여기선 간단히)
-            hesitation_count += len(re.findall(pat, full_text))
-
-    if filler_count == 0:
-        import re
-        # FILLER_WORDS = ["음", "어", "아", "저", "그니까", "그러니까", "뭐", "사실"]
-        for word in FILLER_WORDS:
-            # 단어 단위 매칭을 위해 \b 사용 고려, 한국어는 조사 때문에 \b가 애매할 수 있음.
-            # 여기서는 단순 카운팅
-            filler_count += len(re.findall(word, full_text))
+    habits = detect_speech_habits(stt_result_data)
 
-    return {
+    result = {
         "raw_text_for_gpt": full_text,
         "wpm": wpm,
         "pause_events": pause_events,
         "avg_pause_duration": avg_pause_duration,
         "long_pause_count": long_pause_count,
-        "hesitation_count": hesitation_count,
-        "filler_count": filler_count,
-        "hesitation_list": speech_patterns_result.get('hesitation_list', []),
-        "filler_list": speech_patterns_result.get('filler_list', []),
-        "text_for_logic_analysis": speech_patterns_result.get('text_for_logic_analysis', full_text),
+        "pause_histogram": {"edges_sec": PAUSE_HISTOGRAM_EDGES, "counts": pause_counts.tolist()},
+        "prosody": stt_result_data.get("prosody"),
+        **habits,
+        "text_for_logic_analysis": habits["text_for_logic_analysis"] or full_text,
     }
 
+    # LLM 분석은 선택적 보강: 로컬 검출 결과는 그대로 두고 원본 응답만 덧붙임
+    if STT_LLM_PATTERNS:
+        llm_patterns = analyze_speech_patterns_with_gpt(full_text)
+        if llm_patterns:
+            result["llm_patterns"] = llm_patterns
+            if llm_patterns.get("text_for_logic_analysis"):
+                result["text_for_logic_analysis"] = llm_patterns["text_for_logic_analysis"]
+    return result
+
 
 # ------------------------------------
 # 5. 통합 배치/단일 처리 함수
 # ------------------------------------
+def upload_stt_result(user_id: str, base_name: str, stt_result: Dict[str, Any]) -> bool:
+    """전사 결과와 (있으면) 음성 분석 결과를 Firestore에 올립니다. 모두 성공하면 True."""
+    if not initialize_firebase():
+        print("  ⚠️ Firebase 설정이 올바르지 않아 업로드를 건너뜁니다.")
+        return False
+    ok = upload_to_firebase_text(user_id, base_name, stt_result)
+    if stt_result.get("voice_analysis"):
+        ok = upload_to_firebase_voice_analysis(user_id, base_name, stt_result["voice_analysis"]) and ok
+    return ok
+
+
 def process_single_video(
     video_path: Path,
     user_id: Optional[str] = None,
@@ -451,8 +1736,16 @@ def process_single_video(
     upload_to_firebase: bool = True,
     output_basename: Optional[str] = None,
     enable_gpt_analysis: bool = True,
+    save_audio: Optional[bool] = None,
+    job_id: Optional[str] = None,
+    model_size: Optional[str] = None,
 ):
-    """단일 영상 파일에 대한 STT 분석 및 결과 저장."""
+    """
+    단일 영상 파일에 대한 STT 분석 및 결과 저장.
+    save_audio: WAV 파일을 output_audio_dir에 남길지 여부 (기본 STT_SAVE_AUDIO). 남기지 않으면 메모리에서 바로 전사합니다.
+    job_id: 지정하면 전사 중 부분 결과를 해당 채널(read_stt_channel)로 내보냅니다.
+    model_size: 요청별 Whisper 모델 크기 (STT_MODEL_SIZES 중 하나).
+    """
     set_stt_progress(0, "파일 검증")
     video_path = Path(video_path)
     if not video_path.exists():
@@ -471,13 +1764,20 @@ def process_single_video(
     txt_path = output_json_dir / f"{base_name}_text.txt"
     json_path = output_json_dir / f"{base_name}_analysis.json"
 
+    if save_audio is None:
+        save_audio = STT_SAVE_AUDIO
+
     set_stt_progress(5, "오디오 추출")
-    if not extract_audio(video_path, audio_path):
+    audio = prepare_audio_input(video_path, audio_path, save_wav=save_audio)
+    if audio is None:
         set_stt_progress(5, "오디오 추출 실패")
         raise RuntimeError("오디오 추출에 실패했습니다.")
 
     set_stt_progress(30, "Whisper 로딩")
-    stt_result = whisper_transcribe(audio_path)
+    if job_id:
+        stt_result = transcribe_to_channel(audio, job_id, model_size)
+    else:
+        stt_result = whisper_transcribe(audio, model_size=model_size)
     if not stt_result:
         set_stt_progress(30, "STT 실패")
         raise RuntimeError("STT 전사에 실패했습니다.")
@@ -486,66 +1786,335 @@ def process_single_video(
     try:
         with open(txt_path, 'w', encoding='utf-8') as f:
             f.write(stt_result['full_text'])
-        print(f"  ✅ 텍스트 파일 저장 완료: {txt_path}")
+        if _stt_progress_log:
+            print(f"  ✅ 텍스트 파일 저장 완료: {txt_path}")
     except Exception as e:
         print(f"  ❌ TXT 파일 저장 실패: {e}")
 
     try:
         with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(stt_result, f, ensure_ascii=False, indent=4)
-        print(f"  ✅ 분석 자료 JSON 저장 완료: {json_path}")
+            json.dump(compact_stt_result(stt_result), f, ensure_ascii=False, indent=4)
+        if _stt_progress_log:
+            print(f"  ✅ 분석 자료 JSON 저장 완료: {json_path}")
     except Exception as e:
         print(f"  ❌ JSON 파일 저장 실패: {e}")
 
     stt_result["file_paths"] = {
-        "audio": str(audio_path),
+        "audio": str(audio) if isinstance(audio, Path) else None,
         "text": str(txt_path),
         "json": str(json_path),
     }
     stt_result["base_name"] = base_name
 
-    voice_analysis = None
-    if enable_gpt_analysis and _llm_client:
-        set_stt_progress(80, "GPT 언어습관 분석")
-        voice_analysis = analyze_voice_rhythm_and_patterns(stt_result)
-        stt_result["voice_analysis"] = voice_analysis
+    if enable_gpt_analysis:
+        # 추임새·말끝 흐림은 로컬 검출기로 계산하므로 LLM 키가 없어도 수행
+        set_stt_progress(80, "언어습관 분석")
+        stt_result["voice_analysis"] = analyze_voice_rhythm_and_patterns(stt_result)
 
     if upload_to_firebase:
         set_stt_progress(85, "Firebase 업로드 준비")
-        is_firebase_ok = initialize_firebase()
-        if is_firebase_ok:
-            upload_to_firebase_text(user_id, base_name, stt_result)
-            if voice_analysis:
-                upload_to_firebase_voice_analysis(user_id, base_name, voice_analysis)
-        else:
-            print("  ⚠️ Firebase 설정이 올바르지 않아 업로드를 건너뜁니다.")
+        upload_stt_result(user_id, base_name, stt_result)
 
     set_stt_progress(100, "완료")
     return stt_result
 
 
-def process_multiple_videos(input_dir, output_dir_audio, output_dir_json, user_id):
+def _file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_batch_manifest(manifest_path: Path) -> Dict[str, Dict[str, Any]]:
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("items", {})
+    except Exception as exc:
+        print(f"  ⚠️ 매니페스트를 읽지 못해 새로 시작합니다: {exc}")
+        return {}
+
+
+def _save_batch_manifest(manifest_path: Path, items: Dict[str, Dict[str, Any]]):
+    """중단돼도 깨지지 않도록 임시 파일에 쓴 뒤 교체합니다."""
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "items": items}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def _init_batch_worker(cpu_threads: int):
+    """일괄 처리 워커: 영상 단위로 병렬화하므로 요청 내 병렬/배치 전사는 끄고 단계별 로그를 숨깁니다."""
+    global _worker_cpu_threads, _stt_progress_log, STT_PARALLEL_WORKERS, STT_BATCH_SIZE
+    _worker_cpu_threads = cpu_threads
+    torch.set_num_threads(cpu_threads)
+    _stt_progress_log = False
+    STT_PARALLEL_WORKERS = 1
+    STT_BATCH_SIZE = 1
+    try:
+        get_stt_model(STT_ENGINE)
+    except Exception as exc:
+        print(f"  ⚠️ 워커 모델 사전 로딩 실패 (첫 작업에서 다시 시도): {exc}")
+
+
+def _batch_transcribe_file(video_path: Path, output_dir_audio, output_dir_json) -> Dict[str, Any]:
+    """워커 프로세스에서 영상 하나를 전사·분석합니다. Firebase 업로드는 부모 프로세스가 맡습니다."""
+    return process_single_video(
+        video_path,
+        output_audio_dir=output_dir_audio,
+        output_json_dir=output_dir_json,
+        upload_to_firebase=False,
+    )
+
+
+class _BatchProgress:
+    """일괄 처리 진행률과 처리량(시간당 파일 수, 벽시계 1초당 오디오 초)을 집계합니다."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.audio_sec = 0.0
+        self.started = time.monotonic()
+
+    def report(self, note: str = ""):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        finished = self.done + self.failed
+        files_per_hour = finished / elapsed * 3600
+        eta_sec = (self.total - finished) * elapsed / finished if finished else 0.0
+        print(
+            f"[BATCH] {finished}/{self.total} (완료 {self.done}, 실패 {self.failed}) | "
+            f"{files_per_hour:.1f} 파일/시간 | 오디오 {self.audio_sec / elapsed:.2f}초/초 | "
+            f"경과 {elapsed / 60:.1f}분, 남은 예상 {eta_sec / 60:.1f}분"
+            + (f" | {note}" if note else "")
+        )
+
+
+def process_multiple_videos(
+    input_dir,
+    output_dir_audio,
+    output_dir_json,
+    user_id,
+    workers: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    manifest_path=None,
+    upload_to_firebase: bool = True,
+):
+    """
+    폴더의 MP4 영상을 워커 프로세스 풀로 일괄 처리합니다.
+    manifest_path(기본: output_dir_json/batch_manifest.json)에 영상 내용 해시별 결과를 기록해
+    다시 실행하면 완료된 영상은 건너뛰고, 실패한 영상은 max_retries번까지 재시도합니다.
+    Firebase 업로드는 부모 프로세스의 업로드 스레드에서 전사와 겹쳐 진행하고, 업로드까지 성공해야 done으로 기록합니다.
+    업로드 실패(upload_failed)나 업로드 전 중단(transcribed)된 영상은 다음 실행에서 다시 처리합니다 (전사는 STT 캐시로 생략).
+    워커 프로세스가 비정상 종료되면 실행 중이던 영상마다 실패한 시도로 기록(crashed)하고 풀을 새로 만든 뒤,
+    그 영상들을 하나씩 단독으로 재시도해 원인 영상만 max_retries 초과 시 failed로 남깁니다.
+    """
     input_dir = Path(input_dir)
-    video_files = [f for f in input_dir.glob("*.mp4")]
+    output_dir_json = Path(output_dir_json)
+    output_dir_json.mkdir(parents=True, exist_ok=True)
+    video_files = sorted(input_dir.glob("*.mp4"))
 
     if not video_files:
         print(f"경고: '{input_dir}'에서 처리할 MP4 영상 파일을 찾을 수 없습니다.")
-        return
+        return {}
 
-    print(f"총 {len(video_files)}개의 영상을 처리합니다. 사용자 ID: {user_id}")
+    manifest_path = Path(manifest_path or output_dir_json / "batch_manifest.json")
+    manifest = _load_batch_manifest(manifest_path)
+
+    pending: List[Tuple[str, Path]] = []
+    for video_file in video_files:
+        digest = _file_sha256(video_file)
+        if manifest.get(digest, {}).get("status") == "done":
+            continue
+        if any(digest == queued for queued, _ in pending):
+            continue  # 같은 내용의 파일은 한 번만 처리
+        pending.append((digest, video_file))
+
+    print(
+        f"총 {len(video_files)}개 중 완료됐거나 내용이 같은 {len(video_files) - len(pending)}개를 건너뛰고 "
+        f"{len(pending)}개를 처리합니다. 사용자 ID: {user_id}"
+    )
+    if not pending:
+        return manifest
+
+    cpu_count = detect_cpus()["effective"]  # 일괄 처리는 영상 분석과 겹치지 않으므로 코어 전체를 STT에 사용
+    workers = workers or STT_BACKFILL_WORKERS or max(1, cpu_count // 2)
+    workers = max(1, min(workers, len(pending)))
+    cpu_threads = max(1, cpu_count // workers)
+    max_retries = STT_BACKFILL_RETRIES if max_retries is None else max_retries
+    print(f"  워커 {workers}개 (워커당 CPU 스레드 {cpu_threads}개), 실패 시 최대 {max_retries}회 재시도")
+
+    if upload_to_firebase and not initialize_firebase():
+        print("  ⚠️ Firebase 설정이 올바르지 않아 업로드를 건너뜁니다.")
+        upload_to_firebase = False
+
+    progress = _BatchProgress(len(pending))
+    attempts: Dict[str, int] = {}
+    upload_attempts: Dict[str, int] = {}
+    futures: Dict[Future, Tuple[str, str, Path, Optional[Dict[str, Any]]]] = {}  # 전사/업로드 작업 → (종류, 해시, 파일, 전사 결과)
+    queued = deque(pending)
+    # 워커가 비정상 종료(OOM, 디코더 segfault 등)될 때 실행 중이던 영상: 원인을 가리도록 하나씩 단독으로 재시도
+    suspects: deque = deque()
+    isolating = set()
+
+    def new_pool():
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_batch_worker,
+            initargs=(cpu_threads,),
+        )
 
-    for i, video_file in enumerate(video_files, start=1):
-        print(f"\n--- [{i}/{len(video_files)}] {video_file.name} 처리 시작 ---")
-        try:
-            process_single_video(
-                video_file,
-                user_id=user_id,
-                output_audio_dir=output_dir_audio,
-                output_json_dir=output_dir_json,
+    pool = new_pool()
+    with ThreadPoolExecutor(max_workers=1) as uploader:
+
+        def submit(digest: str, video_file: Path):
+            attempts[digest] = attempts.get(digest, 0) + 1
+            future = pool.submit(_batch_transcribe_file, video_file, output_dir_audio, output_dir_json)
+            futures[future] = ("transcribe", digest, video_file, None)
+
+        def requeue(digest: str, video_file: Path):
+            (suspects if digest in isolating else queued).appendleft((digest, video_file))
+
+        def fill():
+            # 실행 중인 전사가 곧 워커 수만큼이 되도록 제출 (비정상 종료 시 실행 중이던 영상을 알 수 있게 함)
+            running = sum(1 for kind, *_ in futures.values() if kind == "transcribe")
+            if isolating:
+                if not running and suspects:
+                    submit(*suspects.popleft())
+                return
+            while queued and running < workers:
+                submit(*queued.popleft())
+                running += 1
+
+        def submit_upload(digest: str, video_file: Path, stt_result: Dict[str, Any]):
+            upload_attempts[digest] = upload_attempts.get(digest, 0) + 1
+            future = uploader.submit(upload_stt_result, user_id, stt_result["base_name"], stt_result)
+            futures[future] = ("upload", digest, video_file, stt_result)
+
+        def record(digest: str, note: str = "", **fields):
+            manifest[digest] = {**manifest.get(digest, {}), **fields, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            _save_batch_manifest(manifest_path, manifest)
+            progress.report(note)
+
+        def fail(digest: str, video_file: Path, error: str):
+            isolating.discard(digest)
+            progress.failed += 1
+            record(
+                digest, f"❌ {video_file.name} 실패: {error}",
+                file=video_file.name, status="failed", attempts=attempts[digest], error=error,
             )
-        except Exception as exc:
-            print(f"  ❌ {video_file.name} 처리 실패: {exc}")
+
+        def handle_crash(digest: str, video_file: Path, exc: BaseException):
+            """실행 중이던 전사를 모두 실패한 시도로 기록하고 워커 풀을 새로 만듭니다."""
+            nonlocal pool
+            crashed = [(digest, video_file)]
+            for future, (kind, other, other_file, _) in list(futures.items()):
+                if kind == "transcribe":
+                    del futures[future]
+                    crashed.append((other, other_file))
+            error = f"워커 프로세스 비정상 종료: {exc}"
+            print(f"  ❌ {error} (실행 중이던 영상 {len(crashed)}개, 워커 풀을 다시 만듭니다)")
+            for digest, video_file in crashed:
+                if attempts[digest] > max_retries:
+                    fail(digest, video_file, error)
+                    continue
+                record(digest, file=video_file.name, status="crashed", attempts=attempts[digest], error=error)
+                isolating.add(digest)
+                suspects.append((digest, video_file))
+            pool.shutdown(wait=True)
+            pool = new_pool()
+
+        try:
+            fill()
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future not in futures:
+                        continue  # 같은 비정상 종료로 이미 처리됨
+                    kind, digest, video_file, stt_result = futures.pop(future)
+                    if kind == "upload":
+                        try:
+                            uploaded, error = future.result(), "업로드 실패"
+                        except Exception as exc:
+                            uploaded, error = False, str(exc)
+                        if uploaded:
+                            progress.done += 1
+                            record(digest, status="done", error=None)
+                        elif upload_attempts[digest] <= max_retries:
+                            print(f"  ⚠️ {video_file.name} 업로드 실패, 재시도 {upload_attempts[digest]}/{max_retries}: {error}")
+                            submit_upload(digest, video_file, stt_result)
+                        else:
+                            # 다음 실행에서 다시 처리(전사는 STT 캐시로 생략)하도록 done으로 표시하지 않음
+                            progress.failed += 1
+                            record(digest, f"❌ {video_file.name} 업로드 실패: {error}", status="upload_failed", error=error)
+                        continue
+
+                    try:
+                        stt_result = future.result()
+                    except BrokenProcessPool as exc:
+                        handle_crash(digest, video_file, exc)
+                        continue
+                    except Exception as exc:
+                        if attempts[digest] <= max_retries:
+                            print(f"  ⚠️ {video_file.name} 실패, 재시도 {attempts[digest]}/{max_retries}: {exc}")
+                            requeue(digest, video_file)
+                        else:
+                            fail(digest, video_file, str(exc))
+                        continue
+                    else:
+                        isolating.discard(digest)
+                    finally:
+                        fill()
+
+                    audio_sec = float(stt_result.get("duration_sec") or 0.0)
+                    progress.audio_sec += audio_sec
+                    fields = {
+                        "file": video_file.name,
+                        "attempts": attempts[digest],
+                        "audio_sec": round(audio_sec, 2),
+                        "json": stt_result.get("file_paths", {}).get("json"),
+                        "error": None,
+                    }
+                    if upload_to_firebase:
+                        # 업로드가 끝나야 done. 그 전에 중단되면 다음 실행에서 다시 처리
+                        manifest[digest] = {**fields, "status": "transcribed"}
+                        _save_batch_manifest(manifest_path, manifest)
+                        submit_upload(digest, video_file, stt_result)
+                    else:
+                        progress.done += 1
+                        record(digest, status="done", **fields)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    print(f"✅ 일괄 처리 종료: 완료 {progress.done}, 실패 {progress.failed} (매니페스트: {manifest_path})")
+    return manifest
 
 
 if __name__ == "__main__":
-    process_multiple_videos(INPUT_VIDEO_DIR, OUTPUT_AUDIO_DIR, OUTPUT_JSON_DIR, FIREBASE_USER_ID)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="폴더의 MP4 영상을 일괄 STT 처리합니다. 완료된 영상은 매니페스트로 건너뜁니다.")
+    parser.add_argument("--input-dir", default=INPUT_VIDEO_DIR)
+    parser.add_argument("--audio-dir", default=OUTPUT_AUDIO_DIR)
+    parser.add_argument("--json-dir", default=OUTPUT_JSON_DIR)
+    parser.add_argument("--user-id", default=FIREBASE_USER_ID)
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: STT_BACKFILL_WORKERS 또는 CPU 코어 수 / 2)")
+    parser.add_argument("--retries", type=int, default=None, help="실패한 영상 재시도 횟수 (기본: STT_BACKFILL_RETRIES)")
+    parser.add_argument("--manifest", default=None, help="체크포인트 파일 경로 (기본: <json-dir>/batch_manifest.json)")
+    parser.add_argument("--no-upload", action="store_true", help="Firebase 업로드 생략")
+    args = parser.parse_args()
+
+    process_multiple_videos(
+        args.input_dir,
+        args.audio_dir,
+        args.json_dir,
+        args.user_id,
+        workers=args.workers,
+        max_retries=args.retries,
+        manifest_path=args.manifest,
+        upload_to_firebase=not args.no_upload,
+    )
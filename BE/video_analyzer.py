@@ -1,10 +1,25 @@
 import os
+import json
 import cv2
 import mediapipe as mp
 import numpy as np
 import math
 import sys
 import time
+import queue
+import shutil
+import subprocess
+import zipfile
+import tempfile
+import threading
+import multiprocessing
+from collections import namedtuple
+from types import SimpleNamespace
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait
+from pathlib import Path
+
+from resource_planner import get_thread_plan
 
 # ============================
 # 진행률 상태 관리용 (공유 변수)
@@ -19,6 +34,17 @@ def get_progress():
     return _progress
 
 
+# ============================
+# 단계별 프로파일 콜백 (외부 메트릭 시스템 연동용)
+# ============================
+_profile_callback = None
+
+def set_profile_callback(callback):
+    """프로파일링한 분석이 끝날 때마다 callback(profile, metadata)를 호출합니다. None이면 해제."""
+    global _profile_callback
+    _profile_callback = callback
+
+
 # ============================
 # MediaPipe 초기화
 # ============================
@@ -27,154 +53,1457 @@ mp_pose = mp.solutions.pose
 mp_hands = mp.solutions.hands
 
 
-def analyze_video(video_path: str):
+# ============================
+# 프레임 샘플링 설정 (환경 변수)
+# ============================
+# VIDEO_TARGET_FPS가 지정되면 원본 fps 대비 stride를 계산해 사용하고,
+# 아니면 VIDEO_FRAME_STRIDE(기본 1 = 전 프레임 분석)를 그대로 사용합니다.
+VIDEO_FRAME_STRIDE = int(os.getenv("VIDEO_FRAME_STRIDE", "1"))
+VIDEO_TARGET_FPS = float(os.getenv("VIDEO_TARGET_FPS", "0"))
+
+# 병렬 분석 설정: 1이면 순차 분석, 0이면 CPU 코어 수만큼 구간을 나눠 분석
+VIDEO_ANALYSIS_WORKERS = int(os.getenv("VIDEO_ANALYSIS_WORKERS", "1"))
+# 구간 하나가 이보다 짧아지면 프로세스 기동 비용이 더 커서 구간 수를 줄임
+VIDEO_MIN_SHARD_SEC = float(os.getenv("VIDEO_MIN_SHARD_SEC", "20"))
+
+# 추론 해상도 설정: 긴 변 최대 픽셀(예: 640) 또는 배율(예: 0.5). 0이면 원본 해상도로 추론
+VIDEO_INFER_MAX_EDGE = int(os.getenv("VIDEO_INFER_MAX_EDGE", "0"))
+VIDEO_INFER_SCALE = float(os.getenv("VIDEO_INFER_SCALE", "0"))
+# 축소 추론 시 절약 시간 측정을 위해 원본 해상도로도 추론해보는 프레임 수
+_CALIBRATION_FRAMES = 3
+
+# 디코딩/추론 파이프라인: 디코더 스레드용 링 버퍼 슬롯 수. 0이면 한 스레드에서 순차 처리
+VIDEO_PIPELINE_SLOTS = int(os.getenv("VIDEO_PIPELINE_SLOTS", "0"))
+
+# 추론 캐스케이드: Pose를 먼저 돌리고 손목이 보일 때만 Hands, 머리 주변 크롭에만 FaceMesh 실행
+VIDEO_CASCADE = os.getenv("VIDEO_CASCADE", "false").lower() in {"1", "true", "yes", "on"}
+_CASCADE_VISIBILITY = 0.5
+# 머리 keypoint(코·눈·귀·입) 범위 대비 얼굴 크롭 한 변의 배율, 최소 크기(px)
+_FACE_CROP_MARGIN = 2.0
+_FACE_CROP_MIN_PX = 48
+
+# 정적 장면 랜드마크 재사용: 축소 흑백 썸네일의 평균 밝기 차(0~255)가 임계값 미만이면 직전 추론 결과를 재사용.
+# 연속 재사용은 최대 VIDEO_REUSE_MAX_FRAMES(분석 프레임 기준)까지만 허용하고 이후에는 반드시 다시 추론
+VIDEO_REUSE_STATIC = os.getenv("VIDEO_REUSE_STATIC", "false").lower() in {"1", "true", "yes", "on"}
+VIDEO_REUSE_DIFF = float(os.getenv("VIDEO_REUSE_DIFF", "1.0"))
+VIDEO_REUSE_MAX_FRAMES = int(os.getenv("VIDEO_REUSE_MAX_FRAMES", "5"))
+_REUSE_THUMB_SIZE = (64, 36)
+
+# 마감 시간 예산(초): 업로드 후 이 시간 안에 분석이 끝나도록 실측 처리량에 맞춰 모델 구성/stride를 조정. 0이면 끔
+VIDEO_DEADLINE_SEC = float(os.getenv("VIDEO_DEADLINE_SEC", "0"))
+# 예산 모드에서 추론 해상도를 따로 지정하지 않았을 때 사용할 긴 변 최대 픽셀
+VIDEO_DEADLINE_MAX_EDGE = int(os.getenv("VIDEO_DEADLINE_MAX_EDGE", "640"))
+# 예산 모드에서 허용하는 최대 샘플 간격(초). 이보다 성기게는 샘플링하지 않음
+VIDEO_DEADLINE_MAX_GAP_SEC = float(os.getenv("VIDEO_DEADLINE_MAX_GAP_SEC", "1.0"))
+_DEADLINE_CHECK_SEC = 1.0     # 처리량 측정/조정 주기
+_DEADLINE_RESERVE = 0.1       # 결과 계산·프로세스 기동용으로 남겨두는 예산 비율
+_DEADLINE_SLACK = 1.5         # stride를 다시 줄이려면 필요한 처리량의 이 배수 이상이어야 함
+
+# 프레임 소스: opencv(cv2.VideoCapture) 또는 ffmpeg(디코더 안에서 stride 샘플링·축소·RGB 변환 후 rawvideo 파이프)
+VIDEO_FRAME_SOURCE = os.getenv("VIDEO_FRAME_SOURCE", "opencv").lower()
+_PROBE_TIMEOUT_SEC = 60
+
+# 프로세스당 재사용할 MediaPipe 그래프 묶음(FaceMesh/Pose/Hands) 개수 = 동시에 분석 가능한 영상 수
+VIDEO_GRAPH_POOL_SIZE = int(os.getenv("VIDEO_GRAPH_POOL_SIZE", "2"))
+
+# 집계 설정: 랜드마크를 이 프레임 수만큼 모아 한 번에 집계한 뒤 버퍼를 재사용 (영상 길이와 무관한 메모리)
+_METRICS_CHUNK = 512
+# 시선 궤적 샘플 최대 보관 개수 (초과 시 샘플 간격을 두 배로 늘림)
+_TRACE_CAPACITY = 40
+# 구간별 시계열 집계 단위(초). 0이면 시계열을 만들지 않음
+VIDEO_WINDOW_SEC = float(os.getenv("VIDEO_WINDOW_SEC", "1"))
+
+# 단계별 프로파일링 (디코딩/색변환/모델별 process()/후처리의 프레임당 시간 분포). 끄면 측정 코드를 건너뜀
+VIDEO_PROFILE = os.getenv("VIDEO_PROFILE", "false").lower() in {"1", "true", "yes", "on"}
+
+# 평가 임계값 (analyze_video / rescore_timeline의 thresholds 인자로 일부 덮어쓰기 가능)
+DEFAULT_THRESHOLDS = {
+    "gaze_center_box": 0.25,       # 화면 중앙 ± 범위 안이면 정면 응시
+    "gaze_zone_left": 0.33,        # 눈 중심 x가 이보다 작으면 왼쪽
+    "gaze_zone_right": 0.66,       # 이 이상이면 오른쪽
+    "gaze_move_step": 0.05,        # 원본 1프레임당 이동량이 이보다 크면 시선 이동
+    "gaze_center_low": 0.15,       # 정면 응시율 해석 기준
+    "posture_stable": 0.7,
+    "motion_energy_min": 0.15,
+    "motion_energy_max": 0.35,
+    "hand_visibility_min": 0.4,
+    "hand_visibility_max": 0.9,
+    "head_roll_max": 5,
+    "head_yaw_max": 15,
+}
+
+
+def _resolve_frame_stride(fps: float, frame_stride=None, target_fps=None) -> int:
+    """분석할 프레임 간격(stride)을 계산합니다. target_fps가 frame_stride보다 우선합니다."""
+    if frame_stride is None and target_fps is None:
+        frame_stride, target_fps = VIDEO_FRAME_STRIDE, VIDEO_TARGET_FPS
+    if target_fps and target_fps > 0 and fps > 0:
+        return max(1, int(round(fps / target_fps)))
+    return max(1, int(frame_stride or 1))
+
+
+def _resolve_thresholds(overrides=None) -> dict:
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for key, value in (overrides or {}).items():
+        if key not in thresholds:
+            raise ValueError(f"알 수 없는 임계값: {key}")
+        thresholds[key] = float(value)
+    return thresholds
+
+
+def _resolve_inference_size(width: int, height: int, max_long_edge=None, inference_scale=None):
+    """추론 해상도 (w, h)를 계산합니다. 축소가 필요 없으면 None (확대는 하지 않음)."""
+    if max_long_edge is None and inference_scale is None:
+        max_long_edge, inference_scale = VIDEO_INFER_MAX_EDGE, VIDEO_INFER_SCALE
+    if width <= 0 or height <= 0:
+        return None
+    scale = 1.0
+    if max_long_edge and max_long_edge > 0:
+        scale = min(scale, max_long_edge / max(width, height))
+    if inference_scale and inference_scale > 0:
+        scale = min(scale, inference_scale)
+    if scale >= 1.0:
+        return None
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+# ============================
+# MediaPipe 그래프 풀
+# ============================
+_Point = namedtuple("_Point", ["x", "y"])
+_NO_FACE = SimpleNamespace(multi_face_landmarks=None)
+_NO_HANDS = SimpleNamespace(multi_hand_landmarks=None)
+_HEAD_KEYPOINTS = range(0, 11)  # PoseLandmark.NOSE ~ MOUTH_RIGHT
+_WRIST_KEYPOINTS = (mp_pose.PoseLandmark.LEFT_WRIST, mp_pose.PoseLandmark.RIGHT_WRIST)
+
+
+class _CropLandmarks:
+    """얼굴 크롭 기준 정규화 좌표를 원본 프레임 기준 정규화 좌표로 바꿔 돌려주는 landmark 시퀀스."""
+
+    def __init__(self, landmarks, box):
+        self._landmarks = landmarks
+        self._x0, self._y0, self._w, self._h = box
+
+    def __len__(self):
+        return len(self._landmarks)
+
+    def __getitem__(self, index):
+        lm = self._landmarks[index]
+        return _Point(self._x0 + lm.x * self._w, self._y0 + lm.y * self._h)
+
+
+def _visible(lm) -> bool:
+    return lm.visibility > _CASCADE_VISIBILITY and 0 <= lm.x <= 1 and 0 <= lm.y <= 1
+
+
+def _face_crop_box(pose_landmarks, width: int, height: int):
+    """Pose 머리 keypoint를 감싸는 정사각형 크롭 (x, y, side) 픽셀 좌표. 머리가 안 보이면 None."""
+    points = [pose_landmarks[i] for i in _HEAD_KEYPOINTS if _visible(pose_landmarks[i])]
+    if not points:
+        return None
+    xs = [p.x * width for p in points]
+    ys = [p.y * height for p in points]
+    side = max(max(xs) - min(xs), max(ys) - min(ys)) * _FACE_CROP_MARGIN
+    side = int(min(max(side, _FACE_CROP_MIN_PX), width, height))
+    cx, cy = (max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2
+    # 프레임 밖으로 나가지 않게 이동시켜 정사각형(종횡비) 유지
+    x = int(min(max(cx - side / 2, 0), width - side))
+    y = int(min(max(cy - side / 2, 0), height - side))
+    return x, y, side
+
+
+class _ReuseGate:
     """
-    발표 영상의 시선·자세·몸짓·손동작·머리방향을 분석하는 함수
-    진행률(%) 실시간 업데이트 포함
+    정적 장면 판정기. 마지막으로 추론한 프레임의 썸네일과 비교해 차이가 작으면 재사용(True)을 반환합니다.
+    기준 프레임은 추론할 때만 갱신하므로 느린 움직임이 쌓여도 임계값을 넘으면 다시 추론합니다.
     """
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"❌ 영상 파일을 열 수 없습니다: {video_path}")
+    def __init__(self, diff_threshold: float, max_run: int):
+        self.diff_threshold = diff_threshold
+        self.max_run = max_run
+        self.reference = None
+        self.run = 0
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    duration_sec = frame_count / fps if fps > 0 else 0
+    def check(self, frame_rgb) -> bool:
+        thumb = cv2.cvtColor(
+            cv2.resize(frame_rgb, _REUSE_THUMB_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_RGB2GRAY
+        )
+        if self.reference is not None and self.run < self.max_run:
+            if cv2.norm(thumb, self.reference, cv2.NORM_L1) / thumb.size < self.diff_threshold:
+                self.run += 1
+                return True
+        self.reference = thumb
+        self.run = 0
+        return False
 
-    # ============================
-    # 결과 저장용 변수
-    # ============================
-    gaze_trace = []
-    gaze_center_hits = 0
-    total_frames = 0
-    left_count, center_count, right_count = 0, 0, 0
-    gaze_movements = 0
-
-    shoulder_xs, shoulder_ys = [], []
-    posture_stability_values = []
-    motion_energy_values = []
-    hand_visible_frames = 0
-    hand_movement_values = []
-    head_rolls, head_yaws = [] , []
-
-    prev_pose_coords = None
-    prev_eye_center = None
 
-    # ============================
-    # MediaPipe 객체 초기화
-    # ============================
-    face_mesh = mp_face.FaceMesh(refine_landmarks=True, min_detection_confidence=0.4)
-    pose = mp_pose.Pose(min_detection_confidence=0.4)
-    hands = mp_hands.Hands(max_num_hands=2, min_detection_confidence=0.4)
+class _DeadlineController:
+    """
+    마감 시간 안에 구간을 끝내기 위한 샘플링 조정기.
+    _DEADLINE_CHECK_SEC마다 실측 처리량(원본 프레임/초)을 남은 프레임/남은 시간과 비교해
+    부족하면 캐스케이드를 켜고, 그래도 부족하면 stride를 두 배로 늘립니다(max_stride까지).
+    여유가 충분하면 stride를 다시 절반으로 줄입니다. 첫 측정 구간은 그래프 워밍업 이후부터 시작합니다.
+    """
 
-    print(f"🎥 분석 시작: {video_path}")
-    start_time = time.time()
-    last_print = 0
+    def __init__(self, deadline: float, stride: int, max_stride: int, end_frame: int, cascade: bool):
+        self.deadline = deadline
+        self.base_stride = stride
+        self.stride = stride
+        self.max_stride = max(stride, max_stride)
+        self.end_frame = end_frame
+        self.cascade = cascade
+        self.changes = 0
+        self._mark = None
 
-    # ============================
-    # 프레임 단위 분석
-    # ============================
-    while True:
-        success, frame = cap.read()
-        if not success:
-            break
-        total_frames += 1
+    def update(self, frame_idx: int):
+        now = time.time()
+        if self._mark is None:
+            self._mark = (now, frame_idx)
+            return
+        mark_time, mark_frame = self._mark
+        if now - mark_time < _DEADLINE_CHECK_SEC:
+            return
+        self._mark = (now, frame_idx)
+        rate = (frame_idx - mark_frame) / (now - mark_time)
+        time_left = self.deadline - now
+        needed = (self.end_frame - frame_idx) / time_left if time_left > 0 else math.inf
 
-        # --- 진행률 표시 (터미널용) ---
-        if frame_count > 0:
-            progress = int((total_frames / frame_count) * 100)
-            set_progress(progress)
-            if progress % 5 == 0 and progress != last_print:
-                elapsed = time.time() - start_time
-                sys.stdout.write(f"\r⏳ 진행률: {progress}%  (경과 {elapsed:.1f}s)")
-                sys.stdout.flush()
-                last_print = progress
+        if rate < needed:
+            if not self.cascade:
+                self.cascade = True
+            elif self.stride * 2 <= self.max_stride:
+                self.stride *= 2
+            else:
+                return
+            self.changes += 1
+        elif self.stride > self.base_stride and rate / 2 > needed * _DEADLINE_SLACK:
+            self.stride //= 2
+            self.changes += 1
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, _ = frame.shape
 
-        face_result = face_mesh.process(frame_rgb)
-        pose_result = pose.process(frame_rgb)
-        hands_result = hands.process(frame_rgb)
+class _GraphBundle:
+    """한 번에 한 분석 작업이 사용하는 FaceMesh/Pose/Hands 그래프 묶음."""
 
-        # ========= 시선(Gaze) 분석 =========
-        if face_result.multi_face_landmarks:
+    def __init__(self):
+        self.face_mesh = mp_face.FaceMesh(refine_landmarks=True, min_detection_confidence=0.4)
+        self.pose = mp_pose.Pose(min_detection_confidence=0.4)
+        self.hands = mp_hands.Hands(max_num_hands=2, min_detection_confidence=0.4)
+        # 머리 크롭 전용 FaceMesh: 전체 프레임 그래프와 추적 상태(좌표계)가 섞이지 않도록 분리, cascade에서 처음 쓸 때 생성
+        self.face_mesh_crop = None
+        self.failed = False  # 그래프 추론 중 예외가 났으면 풀에 되돌리지 않고 폐기
+
+    def _run(self, name, graph, frame_rgb, calls, profile):
+        if calls is not None:
+            calls[name] += 1
+        t0 = time.perf_counter() if profile is not None else 0.0
+        try:
+            result = graph.process(frame_rgb)
+        except Exception:
+            self.failed = True
+            raise
+        if profile is not None:
+            profile.add(name, time.perf_counter() - t0)
+        return result
+
+    def process(self, frame_rgb, calls=None, profile=None):
+        return (
+            self._run("face", self.face_mesh, frame_rgb, calls, profile),
+            self._run("pose", self.pose, frame_rgb, calls, profile),
+            self._run("hands", self.hands, frame_rgb, calls, profile),
+        )
+
+    def process_cascade(self, frame_rgb, calls, profile=None):
+        """
+        Pose를 먼저 추론하고 그 결과로 나머지 모델 실행 여부를 정합니다.
+        - Hands: 손목 keypoint가 보일 때만 실행
+        - FaceMesh: 머리 keypoint 주변 크롭에서 실행 (사람이 검출되지 않으면 전체 프레임)
+          크롭과 전체 프레임은 좌표계가 달라 추적 상태를 공유하면 안 되므로 크롭은 face_mesh_crop 그래프로 추론
+        """
+        pose_result = self._run("pose", self.pose, frame_rgb, calls, profile)
+        face_result, hands_result = _NO_FACE, _NO_HANDS
+
+        if not pose_result.pose_landmarks:
+            face_result = self._run("face", self.face_mesh, frame_rgb, calls, profile)
+            return face_result, pose_result, hands_result
+
+        lm = pose_result.pose_landmarks.landmark
+        if any(_visible(lm[i]) for i in _WRIST_KEYPOINTS):
+            hands_result = self._run("hands", self.hands, frame_rgb, calls, profile)
+
+        height, width = frame_rgb.shape[:2]
+        box = _face_crop_box(lm, width, height)
+        if box is not None:
+            x, y, side = box
+            crop = np.ascontiguousarray(frame_rgb[y:y + side, x:x + side])
+            if self.face_mesh_crop is None:
+                self.face_mesh_crop = mp_face.FaceMesh(refine_landmarks=True, min_detection_confidence=0.4)
+            crop_result = self._run("face", self.face_mesh_crop, crop, calls, profile)
+            calls["face_crop"] += 1
+            if crop_result.multi_face_landmarks:
+                norm_box = (x / width, y / height, side / width, side / height)
+                face_result = SimpleNamespace(multi_face_landmarks=[
+                    SimpleNamespace(landmark=_CropLandmarks(face.landmark, norm_box))
+                    for face in crop_result.multi_face_landmarks
+                ])
+        return face_result, pose_result, hands_result
+
+    def reset(self):
+        """추적 상태를 지워 새로 만든 그래프와 같은 상태로 되돌립니다."""
+        self.face_mesh.reset()
+        self.pose.reset()
+        self.hands.reset()
+        if self.face_mesh_crop is not None:
+            self.face_mesh_crop.reset()
+
+    def close(self):
+        self.face_mesh.close()
+        self.pose.close()
+        self.hands.close()
+        if self.face_mesh_crop is not None:
+            self.face_mesh_crop.close()
+
+
+class _GraphPool:
+    """
+    미리 초기화한 _GraphBundle을 빌려주고 돌려받는 풀.
+    반납 시 reset()하므로 다음 작업은 새 인스턴스와 같은 결과를 얻습니다.
+    모든 묶음이 사용 중이면 반납될 때까지 대기합니다.
+    추론 중 실패한 묶음은 폐기하고 그 자리에 None을 넣어, 대기 중이던 작업이 새 묶음을 만들게 합니다.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _try_create(self):
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return _GraphBundle()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def warm_up(self):
+        """모든 묶음을 생성하고 빈 프레임으로 한 번씩 추론해 첫 요청의 초기화 지연을 없앱니다."""
+        blank = np.zeros((64, 64, 3), dtype=np.uint8)
+        while True:
+            bundle = self._try_create()
+            if bundle is None:
+                break
+            bundle.process(blank)
+            bundle.reset()
+            self._idle.put(bundle)
+
+    def _acquire(self):
+        try:
+            bundle = self._idle.get_nowait()
+        except queue.Empty:
+            bundle = self._try_create() or self._idle.get()
+        if bundle is None:
+            # 폐기된 묶음의 자리: 새로 만들어 사용 (실패하면 자리를 다음 대기자에게 넘김)
+            try:
+                bundle = _GraphBundle()
+            except BaseException:
+                self._idle.put(None)
+                raise
+        return bundle
+
+    def _release(self, bundle):
+        if not bundle.failed:
+            try:
+                bundle.reset()
+                self._idle.put(bundle)
+                return
+            except Exception:
+                pass
+        # 추론·reset 중 실패한 그래프는 상태를 신뢰할 수 없으므로 닫고 자리만 돌려줌
+        try:
+            bundle.close()
+        except Exception:
+            pass
+        self._idle.put(None)
+
+    @contextmanager
+    def checkout(self):
+        bundle = self._acquire()
+        try:
+            yield bundle
+        finally:
+            # 디코딩·I/O 오류 등 그래프와 무관한 예외면 reset 후 그대로 재사용
+            self._release(bundle)
+
+
+_graph_pool = None
+_graph_pool_lock = threading.Lock()
+
+
+def get_graph_pool(size: int = None) -> _GraphPool:
+    global _graph_pool
+    with _graph_pool_lock:
+        if _graph_pool is None:
+            _graph_pool = _GraphPool(size or VIDEO_GRAPH_POOL_SIZE)
+        return _graph_pool
+
+
+def warm_up_graph_pool(size: int = None):
+    """프로세스 시작 시 호출: 그래프 풀을 만들고 워밍업합니다."""
+    start = time.time()
+    pool = get_graph_pool(size)
+    pool.warm_up()
+    print(f"✅ MediaPipe 그래프 풀 준비 완료 (size={pool.size}, {time.time() - start:.1f}s)")
+    return pool
+
+
+# ============================
+# 병합 가능한 집계기
+# ============================
+class _RunningStat:
+    """평균/분산 누적기 (Welford). 다른 구간의 누적기와 병합할 수 있습니다 (Chan et al.)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def add_batch(self, values: np.ndarray):
+        """여러 값을 한 번에 누적합니다 (배치 통계를 구해 병합)."""
+        if len(values) == 0:
+            return
+        batch = _RunningStat()
+        batch.n = len(values)
+        batch.mean = float(np.mean(values))
+        batch.m2 = float(np.sum((values - batch.mean) ** 2))
+        self.merge(batch)
+
+    def merge(self, other: "_RunningStat"):
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.n) if self.n else 0.0
+
+
+class _LatencyHistogram:
+    """
+    로그 간격 고정 bin(10배당 20개, 1µs~100s) 히스토그램. 프레임 수와 무관한 메모리로 p50/p95를 근사하고 병합할 수 있습니다.
+    """
+
+    _BINS_PER_DECADE = 20
+    _MIN_EXP = -6
+    _BINS = 8 * _BINS_PER_DECADE
+
+    __slots__ = ("counts", "n", "total")
+
+    def __init__(self):
+        self.counts = np.zeros(self._BINS, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+
+    def add(self, seconds: float):
+        index = int((math.log10(max(seconds, 1e-6)) - self._MIN_EXP) * self._BINS_PER_DECADE)
+        self.counts[min(index, self._BINS - 1)] += 1
+        self.n += 1
+        self.total += seconds
+
+    def merge(self, other: "_LatencyHistogram"):
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+
+    def percentile(self, q: float) -> float:
+        """q 분위수가 속한 bin의 기하 중앙값(초)."""
+        if self.n == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), q * self.n))
+        return 10 ** (self._MIN_EXP + (index + 0.5) / self._BINS_PER_DECADE)
+
+
+class _StageProfiler:
+    """
+    단계별 호출당 소요 시간 분포.
+    decode(분석 프레임 1장까지의 read/grab), prepare(축소+색변환), face/pose/hands(모델별 process() 1회),
+    post(랜드마크 복사 + 청크 집계)
+    """
+
+    STAGES = ("decode", "prepare", "face", "pose", "hands", "post")
+
+    def __init__(self):
+        self.stages = {name: _LatencyHistogram() for name in self.STAGES}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage].add(seconds)
+
+    def merge(self, later: "_StageProfiler"):
+        for name, hist in later.stages.items():
+            self.stages[name].merge(hist)
+
+    def to_dict(self) -> dict:
+        profile = {}
+        for name, hist in self.stages.items():
+            profile[name] = {
+                "calls": hist.n,
+                "total_sec": round(hist.total, 3),
+                "mean_ms": round(1000 * hist.total / hist.n, 3) if hist.n else 0,
+                "p50_ms": round(1000 * hist.percentile(0.5), 3),
+                "p95_ms": round(1000 * hist.percentile(0.95), 3),
+                "fps": round(hist.n / hist.total, 1) if hist.total > 0 else 0,
+            }
+        return profile
+
+
+class _TraceSampler:
+    """
+    시선 궤적 샘플러. 원본 프레임 번호가 step의 배수인 점만 보관하고, capacity를 넘으면 step을 두 배로 늘립니다.
+    프레임 번호 기준이라 청크 단위로 넣거나 구간별 샘플러를 병합해도 전체를 한 번에 넣은 것과 같은 결과가 됩니다.
+    """
+
+    def __init__(self, step: int = 1, capacity: int = _TRACE_CAPACITY):
+        self.step = step
+        self.capacity = capacity
+        self.frames = np.zeros(0, dtype=np.int64)
+        self.points = np.zeros((0, 2), dtype=np.float64)
+
+    def _keep(self, frames, points):
+        while True:
+            keep = frames % self.step == 0
+            frames, points = frames[keep], points[keep]
+            if len(frames) <= self.capacity:
+                break
+            self.step *= 2
+        self.frames, self.points = frames, points
+
+    def add_batch(self, frames: np.ndarray, points: np.ndarray):
+        self._keep(np.concatenate([self.frames, frames]), np.concatenate([self.points, points]))
+
+    def merge(self, later: "_TraceSampler"):
+        self.step = max(self.step, later.step)
+        self.add_batch(later.frames, later.points)
+
+    def sample(self) -> list:
+        return self.points.tolist()
+
+
+class _WindowSeries:
+    """
+    고정 길이 구간(window)별 합계/개수 배열. 구간 번호 = 원본 프레임 번호 // window_frames 이므로
+    구간(shard)별 결과를 더하기만 하면 병합됩니다. 메모리는 영상 길이(초)당 컬럼 수만큼만 늘어납니다.
+    """
+
+    _COLUMNS = ("frames", "center_hits", "hand_frames", "motion_sum", "motion_n", "yaw_sum", "yaw_n")
+
+    def __init__(self, window_frames: int):
+        self.window_frames = window_frames
+        self.columns = {name: np.zeros(0, dtype=np.float64) for name in self._COLUMNS}
+
+    def _fit(self, length: int):
+        current = len(self.columns["frames"])
+        if length > current:
+            for name, column in self.columns.items():
+                self.columns[name] = np.concatenate([column, np.zeros(length - current)])
+
+    def add(self, name: str, frame_index: np.ndarray, weights=None):
+        if len(frame_index) == 0:
+            return
+        window = frame_index // self.window_frames
+        counts = np.bincount(window, weights=weights)
+        self._fit(len(counts))
+        self.columns[name][:len(counts)] += counts
+
+    def merge(self, later: "_WindowSeries"):
+        self._fit(len(later.columns["frames"]))
+        for name, column in later.columns.items():
+            self.columns[name][:len(column)] += column
+
+    def to_dict(self, fps: float) -> dict:
+        """프론트엔드용 컬럼형 시계열. 분석한 프레임/검출이 없는 구간은 None."""
+        c = self.columns
+        window_sec = self.window_frames / fps if fps > 0 else 0
+
+        def ratio(num, den, digits):
+            return [round(float(n / d), digits) if d else None for n, d in zip(num, den)]
+
+        return {
+            "window_sec": round(window_sec, 3),
+            "t": [round(i * window_sec, 2) for i in range(len(c["frames"]))],
+            "gaze_center_ratio": ratio(c["center_hits"], c["frames"], 3),
+            "motion_energy": ratio(c["motion_sum"], c["motion_n"], 4),
+            "head_yaw": ratio(c["yaw_sum"], c["yaw_n"], 2),
+            "hand_visibility": ratio(c["hand_frames"], c["frames"], 3),
+        }
+
+
+# ============================
+# 프레임별 랜드마크 저장소
+# ============================
+_FACE_POINTS = (33, 263, 1)  # 왼눈, 오른눈, 코 (FaceMesh 인덱스)
+_POSE_POINTS = 33
+_HAND_POINTS = 21
+_LEFT_SHOULDER = int(mp_pose.PoseLandmark.LEFT_SHOULDER)
+_RIGHT_SHOULDER = int(mp_pose.PoseLandmark.RIGHT_SHOULDER)
+
+
+class _LandmarkStore:
+    """
+    프레임별 랜드마크 좌표를 담는 컬럼형 저장소 (프레임 × 랜드마크 × 2 + 검출 여부 마스크).
+    추론 루프에서는 좌표 복사만 하고, 지표 계산은 _VideoMetrics.add_store()에서 한 번에 벡터화해 수행합니다.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.frame_index = np.zeros(capacity, dtype=np.int64)
+        self.face = np.zeros((capacity, len(_FACE_POINTS), 2), dtype=np.float32)
+        self.face_valid = np.zeros(capacity, dtype=bool)
+        self.pose = np.zeros((capacity, _POSE_POINTS, 2), dtype=np.float32)
+        self.pose_valid = np.zeros(capacity, dtype=bool)
+        self.hands = np.zeros((capacity, 2, _HAND_POINTS, 2), dtype=np.float32)
+        self.hand_count = np.zeros(capacity, dtype=np.int8)
+        # 샘플 1개가 대표하는 원본 프레임 수 (직전 샘플과의 간격)
+        self.step = np.zeros(capacity, dtype=np.int32)
+        # 샘플 1개가 대표하는 분석 프레임 수 (1 + 이 샘플의 랜드마크를 재사용한 뒤따르는 프레임 수)
+        self.samples = np.zeros(capacity, dtype=np.int32)
+
+    _COLUMNS = ("frame_index", "face", "face_valid", "pose", "pose_valid", "hands", "hand_count", "step", "samples")
+
+    def _grow(self):
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros((len(column) * 2,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def append(self, frame_idx: int, step: int, face_result, pose_result, hands_result):
+        i = self.size
+        if i == len(self.frame_index):
+            self._grow()
+        self.frame_index[i] = frame_idx
+        self.step[i] = step
+        self.samples[i] = 1
+
+        self.face_valid[i] = bool(face_result.multi_face_landmarks)
+        if self.face_valid[i]:
             lm = face_result.multi_face_landmarks[0].landmark
-            left_eye = lm[33]; right_eye = lm[263]
-            eye_center_x = (left_eye.x + right_eye.x) / 2
-            eye_center_y = (left_eye.y + right_eye.y) / 2
-            gaze_trace.append([eye_center_x, eye_center_y])
-
-            if abs(eye_center_x - 0.5) < 0.25 and abs(eye_center_y - 0.5) < 0.25:
-                gaze_center_hits += 1
-            if eye_center_x < 0.33: left_count += 1
-            elif eye_center_x < 0.66: center_count += 1
-            else: right_count += 1
-
-            if prev_eye_center is not None:
-                dx, dy = abs(eye_center_x - prev_eye_center[0]), abs(eye_center_y - prev_eye_center[1])
-                if dx > 0.05 or dy > 0.05:
-                    gaze_movements += 1
-            prev_eye_center = (eye_center_x, eye_center_y)
+            self.face[i] = [(lm[j].x, lm[j].y) for j in _FACE_POINTS]
+
+        self.pose_valid[i] = bool(pose_result.pose_landmarks)
+        if self.pose_valid[i]:
+            self.pose[i] = [(p.x, p.y) for p in pose_result.pose_landmarks.landmark]
+
+        hands = hands_result.multi_hand_landmarks or []
+        self.hand_count[i] = min(len(hands), 2)
+        for k, hand in enumerate(hands[:2]):
+            self.hands[i, k] = [(p.x, p.y) for p in hand.landmark]
+
+        self.size += 1
+
+    def view(self, name: str) -> np.ndarray:
+        return getattr(self, name)[:self.size]
+
+    def clear(self):
+        """버퍼는 그대로 두고 비웁니다 (집계가 끝난 청크 재사용)."""
+        self.size = 0
+
+    @classmethod
+    def from_arrays(cls, columns: dict) -> "_LandmarkStore":
+        store = cls(capacity=0)
+        for name in cls._COLUMNS:
+            setattr(store, name, np.asarray(columns[name]))
+        store.size = len(store.frame_index)
+        return store
+
+
+class _VideoMetrics:
+    """
+    프레임별 분석값을 누적하는 집계기.
+    구간(shard)별로 따로 누적한 뒤 시간 순서대로 merge하면 순차 분석과 같은 결과가 됩니다.
+    구간 경계의 이전 프레임 의존 값(시선 이동, motion energy)은 각 구간의 첫/마지막 검출값으로 merge 시 계산합니다.
+    """
+
+    def __init__(self, stride: int = 1, thresholds: dict = None, window_frames: int = 0):
+        self.stride = stride
+        self.thresholds = thresholds or DEFAULT_THRESHOLDS
+        self.total_frames = 0
+        self.analyzed_frames = 0
+        # 지표에 들어간 샘플 수 (재사용 프레임은 샘플로 넣지 않으므로 비율 지표의 분모)
+        self.sampled_frames = 0
+
+        self.gaze_trace = _TraceSampler(stride)
+        self.gaze_center_hits = 0
+        self.left_count, self.center_count, self.right_count = 0, 0, 0
+        self.gaze_movements = 0.0
+
+        self.shoulder_x, self.shoulder_y = _RunningStat(), _RunningStat()
+        self.posture_roll = _RunningStat()
+        self.motion_energy = _RunningStat()
+        self.hand_visible_frames = 0
+        self.hand_movement = _RunningStat()
+        self.head_roll, self.head_yaw = _RunningStat(), _RunningStat()
+        # 구간(window)별 시계열 (window_frames가 0이면 생략)
+        self.windows = _WindowSeries(window_frames) if window_frames > 0 else None
+
+        # 단계별 소요 시간: 디코딩, 전처리(축소+색변환), 추론(3개 모델), 파이프라인 대기
+        self.decode_sec = 0.0
+        self.prepare_sec = 0.0
+        self.infer_sec = 0.0
+        self.decode_wait_sec = 0.0
+        self.infer_wait_sec = 0.0
+        # 축소 추론 시 원본 해상도 비교 측정값
+        self.calibration = None
+        # 모델별 실제 추론 횟수 (캐스케이드 사용 시 건너뛴 비율 계산용)
+        self.model_calls = {"face": 0, "face_crop": 0, "pose": 0, "hands": 0}
+        # 정적 장면으로 판정돼 직전 랜드마크를 재사용한 분석 프레임 수
+        self.reused_frames = 0
+        # 마감 시간 예산 모드: stride별 분석 프레임 수, 조정 횟수, 캐스케이드 전환 여부
+        self.stride_frames = {}
+        self.budget_changes = 0
+        self.budget_cascade = False
+        # 단계별 프로파일 (profile 옵션을 켠 경우에만 생성)
+        self.profile = None
+
+        # 구간 경계 처리용 (첫 검출값 / 마지막 검출값)
+        self.first_eye_center = None
+        self.prev_eye_center = None
+        self.prev_eye_samples = 1
+        self.first_eye_step = None
+        self.first_pose_coords = None
+        self.first_pose_frame = None
+        self.first_pose_step = None
+        self.prev_pose_coords = None
+
+    def _gaze_moved_frames(self, delta: np.ndarray, steps: np.ndarray, prev_samples: np.ndarray) -> float:
+        """
+        샘플 간 시선 이동(delta)을 원본 1프레임당 이동량으로 환산해 이동으로 판정된 원본 프레임 수의 합을 반환합니다.
+        평균 이동량이 임계값을 넘으면 간격(step) 전체를 셉니다. 직전 샘플 뒤에 재사용 프레임이 있었다면(prev_samples > 1)
+        그 프레임들은 직전 샘플과 거의 같은 장면이므로, 평균으로는 넘지 않아도 마지막 분석 간격에서 넘으면 그 간격만 셉니다.
+        """
+        threshold = self.thresholds["gaze_move_step"]
+        delta = np.abs(delta)
+        last_step = steps / prev_samples
+        spread = (delta / steps[:, None] > threshold).any(axis=1)
+        jump = (delta / last_step[:, None] > threshold).any(axis=1)
+        return float(np.where(spread, steps, np.where(jump, last_step, 0.0)).sum())
+
+    def _gaze_moved(self, prev, current, step: int, prev_samples: int) -> float:
+        delta = np.asarray([current], dtype=np.float64) - np.asarray([prev], dtype=np.float64)
+        return self._gaze_moved_frames(delta, np.array([float(step)]), np.array([float(prev_samples)]))
+
+    def _motion(self, prev, current, step: int) -> float:
+        return float(np.linalg.norm(current - prev)) / step
+
+    def add_store(self, store: _LandmarkStore, start: int = 0):
+        """저장소의 start번째 이후 프레임들의 지표를 한 번에 벡터화해 누적합니다. (저장소는 시간 순서)"""
+        th = self.thresholds
+        windows = self.windows
+
+        def column(name):
+            return store.view(name)[start:]
+
+        frame_index = column("frame_index")
+        steps = column("step").astype(np.float64)
+        # 비율·평균 지표는 재사용 프레임까지 포함하도록 샘플마다 대표하는 분석 프레임 수로 가중
+        weights = column("samples")
+        self.sampled_frames += int(weights.sum())
+        face_valid, pose_valid = column("face_valid"), column("pose_valid")
+        if windows is not None:
+            windows.add("frames", frame_index, weights)
+
+        # ========= 시선(Gaze) 분석 =========
+        face = column("face")[face_valid].astype(np.float64)
+        if len(face):
+            face_frames = frame_index[face_valid]
+            left_eye, right_eye, nose = face[:, 0], face[:, 1], face[:, 2]
+            eye_center = (left_eye + right_eye) / 2
+            ex, ey = eye_center[:, 0], eye_center[:, 1]
+            self.gaze_trace.add_batch(face_frames, eye_center)
+
+            box = th["gaze_center_box"]
+            left, right = th["gaze_zone_left"], th["gaze_zone_right"]
+            face_weights = weights[face_valid]
+            center_hit = (np.abs(ex - 0.5) < box) & (np.abs(ey - 0.5) < box)
+            self.gaze_center_hits += int(face_weights[center_hit].sum())
+            self.left_count += int(face_weights[ex < left].sum())
+            self.center_count += int(face_weights[(ex >= left) & (ex < right)].sum())
+            self.right_count += int(face_weights[ex >= right].sum())
+
+            face_steps = steps[face_valid]
+            if self.prev_eye_center is not None:
+                self.gaze_movements += self._gaze_moved(
+                    self.prev_eye_center, eye_center[0], face_steps[0], self.prev_eye_samples
+                )
+            else:
+                self.first_eye_center = tuple(eye_center[0])
+                self.first_eye_step = face_steps[0]
+            self.gaze_movements += self._gaze_moved_frames(
+                np.diff(eye_center, axis=0), face_steps[1:], face_weights[:-1].astype(np.float64)
+            )
+            self.prev_eye_center = tuple(eye_center[-1])
+            self.prev_eye_samples = int(face_weights[-1])
 
             # 얼굴 방향
-            nose = np.array([lm[1].x, lm[1].y])
-            dx_eye = right_eye.x - left_eye.x
-            dy_eye = right_eye.y - left_eye.y
-            roll = np.degrees(np.arctan2(dy_eye, dx_eye))
-            head_rolls.append(abs(roll))
-            yaw = np.degrees(np.arctan2(nose[0] - 0.5, 0.5))
-            head_yaws.append(abs(yaw))
+            eye_delta = right_eye - left_eye
+            head_yaw = np.abs(np.degrees(np.arctan2(nose[:, 0] - 0.5, 0.5)))
+            head_roll = np.abs(np.degrees(np.arctan2(eye_delta[:, 1], eye_delta[:, 0])))
+            self.head_roll.add_batch(np.repeat(head_roll, face_weights))
+            self.head_yaw.add_batch(np.repeat(head_yaw, face_weights))
+            if windows is not None:
+                windows.add("center_hits", face_frames, center_hit * face_weights)
+                windows.add("yaw_sum", face_frames, head_yaw * face_weights)
+                windows.add("yaw_n", face_frames, face_weights)
 
         # ========= 자세(Posture) 분석 =========
-        if pose_result.pose_landmarks:
-            lm = pose_result.pose_landmarks.landmark
-            left_shoulder = lm[mp_pose.PoseLandmark.LEFT_SHOULDER]
-            right_shoulder = lm[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-            center_x = (left_shoulder.x + right_shoulder.x) / 2
-            center_y = (left_shoulder.y + right_shoulder.y) / 2
-            shoulder_xs.append(center_x)
-            shoulder_ys.append(center_y)
-
-            dx, dy = right_shoulder.x - left_shoulder.x, right_shoulder.y - left_shoulder.y
-            roll_angle = math.degrees(math.atan2(dy, dx))
-            if roll_angle > 90: roll_angle -= 180
-            elif roll_angle < -90: roll_angle += 180
-            posture_stability_values.append(abs(roll_angle))
-
-            current_pose = np.array([[p.x, p.y] for p in pose_result.pose_landmarks.landmark])
-            if prev_pose_coords is not None:
-                diff = np.linalg.norm(current_pose - prev_pose_coords)
-                motion_energy_values.append(diff)
-            prev_pose_coords = current_pose
+        pose = column("pose")[pose_valid].astype(np.float64)
+        if len(pose):
+            pose_frames = frame_index[pose_valid]
+            left_shoulder, right_shoulder = pose[:, _LEFT_SHOULDER], pose[:, _RIGHT_SHOULDER]
+            pose_weights = weights[pose_valid]
+            center = np.repeat((left_shoulder + right_shoulder) / 2, pose_weights, axis=0)
+            self.shoulder_x.add_batch(center[:, 0])
+            self.shoulder_y.add_batch(center[:, 1])
+
+            delta = right_shoulder - left_shoulder
+            roll_angle = np.degrees(np.arctan2(delta[:, 1], delta[:, 0]))
+            roll_angle = np.where(roll_angle > 90, roll_angle - 180, roll_angle)
+            roll_angle = np.where(roll_angle < -90, roll_angle + 180, roll_angle)
+            self.posture_roll.add_batch(np.repeat(np.abs(roll_angle), pose_weights))
+
+            pose_steps = steps[pose_valid]
+            # 이동량은 추론한 샘플 사이에서만 계산 (재사용 구간은 step에 포함돼 프레임당 이동량으로 환산됨)
+            motion = np.sqrt(np.sum(np.diff(pose, axis=0) ** 2, axis=(1, 2))) / pose_steps[1:]
+            motion_frames = pose_frames[1:]
+            if self.prev_pose_coords is not None:
+                # 이전 청크/구간 마지막 검출과의 움직임은 이번 첫 검출 프레임의 구간에 포함
+                motion = np.concatenate([[self._motion(self.prev_pose_coords, pose[0], pose_steps[0])], motion])
+                motion_frames = pose_frames
+            else:
+                self.first_pose_coords = pose[0]
+                self.first_pose_frame = int(pose_frames[0])
+                self.first_pose_step = pose_steps[0]
+            self.motion_energy.add_batch(motion)
+            self.prev_pose_coords = pose[-1]
+            if windows is not None:
+                windows.add("motion_sum", motion_frames, motion)
+                windows.add("motion_n", motion_frames)
 
         # ========= 손(Hand) 분석 =========
-        if hands_result.multi_hand_landmarks:
-            hand_visible_frames += 1
-            centers = []
-            for hand in hands_result.multi_hand_landmarks:
-                cx = np.mean([lm.x for lm in hand.landmark])
-                cy = np.mean([lm.y for lm in hand.landmark])
-                centers.append((cx, cy))
-            if len(centers) == 2:
-                dist = np.linalg.norm(np.array(centers[0]) - np.array(centers[1]))
-                hand_movement_values.append(dist)
-
-    cap.release()
-    print("\n✅ 영상 분석 완료!\n")
-    set_progress(100)
+        hand_count = column("hand_count")
+        hand_visible = hand_count > 0
+        self.hand_visible_frames += int(weights[hand_visible].sum())
+        if windows is not None:
+            windows.add("hand_frames", frame_index[hand_visible], weights[hand_visible])
+        both = column("hands")[hand_count == 2].astype(np.float64)
+        if len(both):
+            centers = both.mean(axis=2)
+            spread = np.linalg.norm(centers[:, 0] - centers[:, 1], axis=1)
+            self.hand_movement.add_batch(np.repeat(spread, weights[hand_count == 2]))
 
-    # ============================
-    # 결과 계산
-    # ============================
-    gaze_center_ratio = gaze_center_hits / total_frames if total_frames > 0 else 0
-    sigma_x = np.std(shoulder_xs) if shoulder_xs else 0
-    sigma_y = np.std(shoulder_ys) if shoulder_ys else 0
-    mean_roll = np.mean(posture_stability_values) if posture_stability_values else 0
+    def merge(self, later: "_VideoMetrics"):
+        """바로 뒤 시간 구간의 집계기를 병합합니다."""
+        self.total_frames += later.total_frames
+        self.analyzed_frames += later.analyzed_frames
+        self.sampled_frames += later.sampled_frames
+
+        self.gaze_trace.merge(later.gaze_trace)
+        self.gaze_center_hits += later.gaze_center_hits
+        self.left_count += later.left_count
+        self.center_count += later.center_count
+        self.right_count += later.right_count
+        self.gaze_movements += later.gaze_movements
+        if self.prev_eye_center is not None and later.first_eye_center is not None:
+            self.gaze_movements += self._gaze_moved(
+                self.prev_eye_center, later.first_eye_center, later.first_eye_step, self.prev_eye_samples
+            )
+
+        for name in ("shoulder_x", "shoulder_y", "posture_roll", "motion_energy",
+                     "hand_movement", "head_roll", "head_yaw"):
+            getattr(self, name).merge(getattr(later, name))
+        if self.windows is not None and later.windows is not None:
+            self.windows.merge(later.windows)
+        if self.prev_pose_coords is not None and later.first_pose_coords is not None:
+            motion = self._motion(self.prev_pose_coords, later.first_pose_coords, later.first_pose_step)
+            self.motion_energy.add(motion)
+            if self.windows is not None:
+                frame = np.array([later.first_pose_frame])
+                self.windows.add("motion_sum", frame, [motion])
+                self.windows.add("motion_n", frame)
+        self.hand_visible_frames += later.hand_visible_frames
+        for name in ("decode_sec", "prepare_sec", "infer_sec", "decode_wait_sec", "infer_wait_sec"):
+            setattr(self, name, getattr(self, name) + getattr(later, name))
+        if self.calibration is None:
+            self.calibration = later.calibration
+        for name, count in later.model_calls.items():
+            self.model_calls[name] += count
+        self.reused_frames += later.reused_frames
+        for stride, count in later.stride_frames.items():
+            self.stride_frames[stride] = self.stride_frames.get(stride, 0) + count
+        self.budget_changes += later.budget_changes
+        self.budget_cascade = self.budget_cascade or later.budget_cascade
+        if self.profile is not None and later.profile is not None:
+            self.profile.merge(later.profile)
+
+        if self.first_eye_center is None:
+            self.first_eye_center = later.first_eye_center
+            self.first_eye_step = later.first_eye_step
+        if later.prev_eye_center is not None:
+            self.prev_eye_center = later.prev_eye_center
+            self.prev_eye_samples = later.prev_eye_samples
+        if self.first_pose_coords is None:
+            self.first_pose_coords = later.first_pose_coords
+            self.first_pose_frame = later.first_pose_frame
+            self.first_pose_step = later.first_pose_step
+        if later.prev_pose_coords is not None:
+            self.prev_pose_coords = later.prev_pose_coords
+
+
+# ============================
+# 구간 단위 분석
+# ============================
+def _make_progress_reporter(frame_count: int, start_time: float):
+    """디코딩한 프레임 수를 받아 진행률(%)을 갱신/출력하는 함수를 반환합니다."""
+    last_print = [0]
+
+    def report(done_frames: int):
+        if frame_count <= 0:
+            return
+        progress = min(99, int((done_frames / frame_count) * 100))
+        set_progress(progress)
+        if progress % 5 == 0 and progress != last_print[0]:
+            elapsed = time.time() - start_time
+            sys.stdout.write(f"\r⏳ 진행률: {progress}%  (경과 {elapsed:.1f}s)")
+            sys.stdout.flush()
+            last_print[0] = progress
+
+    return report
+
+
+def _prepare_frame(frame, infer_size, out=None):
+    """추론 해상도로 축소(필요 시)한 뒤 RGB로 변환합니다. 랜드마크는 정규화 좌표라 해상도와 무관합니다."""
+    if infer_size is not None:
+        frame = cv2.resize(frame, infer_size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+
+
+def _decode_frames(cap, stride: int, start_frame: int, end_frame, metrics, control=None):
+    """
+    샘플링 대상 프레임만 (원본 프레임 번호, BGR)로 내보냅니다. 버퍼는 재사용되므로 다음 프레임 전까지만 유효합니다.
+    control(_DeadlineController)이 있으면 다음 샘플까지의 간격을 매번 control.stride로 정합니다.
+    """
+    frame = None
+    frame_idx = start_frame
+    next_sample = start_frame
+    profile = metrics.profile
+    frame_decode = 0.0
+    while end_frame is None or frame_idx < end_frame:
+        t0 = time.perf_counter()
+        # 샘플링 대상이 아닌 프레임은 디코딩만 진행(grab)하고 넘어감
+        if frame_idx < next_sample:
+            if not cap.grab():
+                break
+            frame_idx += 1
+            metrics.total_frames += 1
+            elapsed = time.perf_counter() - t0
+            metrics.decode_sec += elapsed
+            frame_decode += elapsed
+            continue
+
+        success, frame = cap.read(frame)
+        if not success:
+            break
+        metrics.total_frames += 1
+        elapsed = time.perf_counter() - t0
+        metrics.decode_sec += elapsed
+        if profile is not None:
+            profile.add("decode", frame_decode + elapsed)
+            frame_decode = 0.0
+        next_sample = frame_idx + (control.stride if control is not None else stride)
+        yield frame_idx, frame
+        frame_idx += 1
+
+
+def _iter_frames(cap, options: dict, start_frame: int, end_frame, metrics, control=None):
+    """순차 모드: 디코딩 → 전처리를 추론과 같은 스레드에서 수행합니다. (프레임 번호, RGB 프레임)을 내보냅니다."""
+    infer_size = options.get("infer_size")
+    for frame_idx, frame in _decode_frames(cap, options["stride"], start_frame, end_frame, metrics, control):
+        t0 = time.perf_counter()
+        frame_rgb = _prepare_frame(frame, infer_size)
+        elapsed = time.perf_counter() - t0
+        metrics.prepare_sec += elapsed
+        if metrics.profile is not None:
+            metrics.profile.add("prepare", elapsed)
+        yield frame_idx, frame_rgb
+
+
+def _iter_frames_pipelined(cap, options: dict, start_frame: int, end_frame, metrics, slots: int, control=None):
+    """
+    파이프라인 모드: 디코더 스레드가 미리 할당한 RGB 프레임 링 버퍼를 채우고, 호출 측(추론 단계)이 소비합니다.
+    빈 슬롯이 없으면 디코더가 대기하므로(backpressure) 영상 길이와 무관하게 메모리 사용량이 고정됩니다.
+    내보낸 슬롯은 다음 프레임을 요청할 때 반납됩니다.
+    """
+    resize = options.get("infer_size")
+    # 슬롯 버퍼는 실제 디코딩된 프레임 크기로 처음 채울 때 할당 (CAP_PROP 해상도는 회전·코덱에 따라 다를 수 있음)
+    ring = [None] * slots
+    free_slots, filled = queue.Queue(), queue.Queue()
+    for slot in range(slots):
+        free_slots.put(slot)
+    stop = threading.Event()
+
+    def decoder():
+        try:
+            frames = _decode_frames(cap, options["stride"], start_frame, end_frame, metrics, control)
+            for frame_idx, frame in frames:
+                t0 = time.perf_counter()
+                while True:
+                    try:
+                        slot = free_slots.get(timeout=0.1)
+                        break
+                    except queue.Empty:
+                        if stop.is_set():
+                            return
+                t1 = time.perf_counter()
+                metrics.decode_wait_sec += t1 - t0
+                shape = (resize[1], resize[0], 3) if resize is not None else frame.shape
+                buf = ring[slot]
+                if buf is None or buf.shape != shape:
+                    buf = np.empty(shape, dtype=np.uint8)
+                ring[slot] = _prepare_frame(frame, resize, out=buf)
+                elapsed = time.perf_counter() - t1
+                metrics.prepare_sec += elapsed
+                if metrics.profile is not None:
+                    metrics.profile.add("prepare", elapsed)
+                filled.put((frame_idx, slot))
+            filled.put(None)
+        except BaseException as e:
+            filled.put(e)
+
+    thread = threading.Thread(target=decoder, name="video-decoder", daemon=True)
+    thread.start()
+    try:
+        while True:
+            t0 = time.perf_counter()
+            item = filled.get()
+            metrics.infer_wait_sec += time.perf_counter() - t0
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            frame_idx, slot = item
+            yield frame_idx, ring[slot]
+            free_slots.put(slot)
+    finally:
+        stop.set()
+        thread.join()
+
+
+# ============================
+# ffmpeg 프레임 소스 / ffprobe
+# ============================
+_binaries = {}
+
+
+def _find_binary(name: str):
+    """ffmpeg/ffprobe 실행 파일 경로. {NAME}_BINARY 환경 변수 → PATH → (ffmpeg만) moviepy가 쓰는 imageio-ffmpeg 순."""
+    if name not in _binaries:
+        path = os.getenv(f"{name.upper()}_BINARY") or shutil.which(name)
+        if path is None and name == "ffmpeg":
+            try:
+                import imageio_ffmpeg
+                path = imageio_ffmpeg.get_ffmpeg_exe()
+            except Exception:
+                path = None
+        _binaries[name] = path
+    return _binaries[name]
+
+
+def _parse_rate(rate: str) -> float:
+    num, _, den = (rate or "0/1").partition("/")
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def _probe_video(video_path: str):
+    """
+    ffprobe로 영상 스트림 정보를 읽습니다. 가변 프레임레이트(VFR) 휴대폰 영상은 CAP_PROP_FRAME_COUNT가
+    부정확하므로 패킷을 실제로 세어(-count_packets) 프레임 수를 구합니다. 회전 메타데이터가 있으면
+    디코더 출력(자동 회전)과 같게 가로/세로를 바꿉니다. ffprobe가 없거나 실패하면 None.
+    constant_rate는 r_frame_rate와 avg_frame_rate가 같은(고정 프레임레이트) 영상의 프레임레이트, VFR이면 0입니다.
+    """
+    ffprobe = _find_binary("ffprobe")
+    if ffprobe is None:
+        return None
+    cmd = [
+        ffprobe, "-v", "error", "-select_streams", "v:0", "-count_packets",
+        "-show_entries",
+        "stream=width,height,avg_frame_rate,r_frame_rate,nb_read_packets"
+        ":stream_tags=rotate:stream_side_data=rotation:format=duration",
+        "-of", "json", video_path,
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True, timeout=_PROBE_TIMEOUT_SEC).stdout
+        data = json.loads(out)
+        stream = data["streams"][0]
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError, IndexError) as e:
+        print(f"⚠️ ffprobe 실패, OpenCV 메타데이터 사용: {e}")
+        return None
+
+    width, height = int(stream.get("width", 0)), int(stream.get("height", 0))
+    rotation = stream.get("tags", {}).get("rotate", 0)
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    if abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width
+
+    frame_count = int(stream.get("nb_read_packets") or 0)
+    duration_sec = float(data.get("format", {}).get("duration") or 0)
+    avg_rate, real_rate = _parse_rate(stream.get("avg_frame_rate")), _parse_rate(stream.get("r_frame_rate"))
+    constant_rate = real_rate if real_rate > 0 and abs(avg_rate - real_rate) <= real_rate * 1e-3 else 0.0
+    fps = avg_rate or real_rate
+    if frame_count > 0 and duration_sec > 0:
+        fps = frame_count / duration_sec
+    return {
+        "fps": fps, "constant_rate": constant_rate, "width": width, "height": height,
+        "frame_count": frame_count, "duration_sec": duration_sec,
+    }
+
+
+def _iter_frames_ffmpeg(video_path: str, options: dict, start_frame: int, end_frame, metrics, control=None):
+    """
+    ffmpeg 모드: ffmpeg가 디코딩·stride 샘플링(select)·축소·RGB 변환까지 수행해 rgb24 rawvideo를 파이프로 내보내고,
+    미리 할당한 프레임 버퍼 하나에 readinto로 바로 읽어 (프레임 번호, RGB 프레임)을 내보냅니다.
+    프레임당 메모리 할당과 cvtColor가 없고, 디코딩은 ffmpeg 프로세스에서 추론과 병렬로 진행됩니다.
+    버퍼는 재사용되므로 다음 프레임 전까지만 유효합니다.
+    """
+    stride = options["stride"]
+    width, height = options.get("infer_size") or options["frame_size"]
+    rate = options.get("constant_rate") or 0
+    # 구간 워커는 앞부분을 디코딩하지 않도록 입력 탐색(-ss)으로 start_frame부터 읽음.
+    # 반 프레임 앞을 지정하면 정확 탐색이 start_frame 직전 프레임까지 버리므로 출력 n=0이 start_frame이 됨.
+    # 시각→프레임 번호 환산은 고정 프레임레이트에서만 정확하므로 VFR 영상은 탐색 없이 프레임 번호로 자름
+    seek = start_frame if start_frame > 0 and rate > 0 else 0
+    select = f"not(mod(n+{seek},{stride}))"
+    # 탐색 후에도 구간 경계는 프레임 번호로 한 번 더 제한 (탐색을 못 하면 기존처럼 앞에서부터 센 번호로 자름)
+    if start_frame > seek:
+        select += f"*gte(n,{start_frame})"
+    if end_frame is not None:
+        select += f"*lt(n,{end_frame - seek})"
+    filters = [f"select='{select}'"]
+    if options.get("infer_size"):
+        filters.append(f"scale={width}:{height}:flags=area")
+    cmd = [_find_binary("ffmpeg"), "-v", "error", "-nostdin"]
+    if seek:
+        cmd += ["-ss", f"{(seek - 0.5) / rate:.6f}"]
+    cmd += ["-i", video_path, "-vf", ",".join(filters), "-vsync", "passthrough"]
+    if end_frame is not None:
+        # select는 프레임을 버리기만 하므로, 구간의 샘플 수만큼 내보내면 ffmpeg가 끝까지 디코딩하지 않고 종료하게 함
+        cmd += ["-frames:v", str(-(-end_frame // stride) - -(-start_frame // stride))]
+    cmd += ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    buffer = memoryview(frame).cast("B")
+    frame_bytes = len(buffer)
+    profile = metrics.profile
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=frame_bytes)
+    frame_idx = -(-start_frame // stride) * stride
+    next_sample = frame_idx
+    try:
+        while True:
+            t0 = time.perf_counter()
+            received = 0
+            while received < frame_bytes:
+                n = proc.stdout.readinto(buffer[received:])
+                if not n:
+                    break
+                received += n
+            if received < frame_bytes:
+                break
+            elapsed = time.perf_counter() - t0
+            metrics.decode_sec += elapsed
+            metrics.total_frames = frame_idx + 1 - start_frame
+            if profile is not None:
+                profile.add("decode", elapsed)
+
+            # 마감 시간 예산 모드에서 stride를 늘린 경우: ffmpeg는 기본 stride로 내보내므로 여기서 건너뜀
+            if control is not None and frame_idx < next_sample:
+                frame_idx += stride
+                continue
+            if control is not None:
+                next_sample = frame_idx + control.stride
+            yield frame_idx, frame
+            frame_idx += stride
+
+        # 샘플 사이 마지막 프레임들까지 원본 프레임 수에 포함
+        segment_end = end_frame if end_frame is not None else options.get("frame_count", 0)
+        metrics.total_frames = max(metrics.total_frames, segment_end - start_frame)
+        if proc.wait() != 0 and metrics.analyzed_frames == 0:
+            raise ValueError(f"❌ ffmpeg로 영상을 디코딩할 수 없습니다: {video_path}")
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+def _calibrate_inference(video_path: str, graphs, options: dict):
+    """
+    영상 앞부분 샘플 프레임(_CALIBRATION_FRAMES + 워밍업 1장)을 따로 읽어 축소 해상도와 원본 해상도의
+    프레임당 전처리+추론 시간을 잽니다. 본 분석과 같은 캐스케이드 설정으로 추론하고, 해상도마다 그래프를 reset해
+    추적 상태가 섞이지 않게 합니다 (호출 측은 측정 후 다시 reset). 측정하지 않으면 {"skipped": 이유}를 반환합니다.
+    """
+    infer_size = options.get("infer_size")
+    if infer_size is None:
+        return {"skipped": "원본 해상도로 추론"}
+    stride = options["stride"]
+    cascade = options.get("cascade", False)
+    cap = cv2.VideoCapture(video_path)
+    raws = []
+    try:
+        frame_idx = 0
+        while len(raws) < _CALIBRATION_FRAMES + 1:
+            if frame_idx % stride:
+                ok = cap.grab()
+            else:
+                ok, frame = cap.read()
+                if ok:
+                    raws.append(frame)
+            if not ok:
+                break
+            frame_idx += 1
+    finally:
+        cap.release()
+    if len(raws) < 2:
+        return {"skipped": "보정용 프레임을 읽지 못함"}
+
+    calls = {"face": 0, "face_crop": 0, "pose": 0, "hands": 0}
+    timings = {}
+    for name, size in (("reduced", infer_size), ("full", None)):
+        graphs.reset()
+        elapsed = []
+        for raw in raws:
+            t0 = time.perf_counter()
+            frame_rgb = _prepare_frame(raw, size)
+            if cascade:
+                graphs.process_cascade(frame_rgb, calls)
+            else:
+                graphs.process(frame_rgb, calls)
+            elapsed.append(time.perf_counter() - t0)
+        # 첫 프레임은 그래프 워밍업(검출 단계)이라 제외
+        timings[name] = 1000 * sum(elapsed[1:]) / len(elapsed[1:])
+    return {"frames": len(raws) - 1, "cascade": bool(cascade), "reduced_ms": timings["reduced"], "full_ms": timings["full"]}
+
+
+def _analyze_segment(video_path: str, options: dict, start_frame: int = 0, end_frame: int = None, on_frame=None):
+    """
+    [start_frame, end_frame) 구간을 그래프 풀에서 빌린 MediaPipe 그래프로 분석해 _VideoMetrics를 반환합니다.
+    options: stride(샘플링 간격), infer_size(추론 해상도 또는 None), pipeline_slots(0이면 순차 모드),
+             cascade(Pose 결과로 Hands/FaceMesh 실행 여부 결정), profile(단계별 시간 분포 측정),
+             reuse(None 또는 (차이 임계값, 최대 연속 재사용 수): 정적 장면에서 직전 랜드마크 재사용),
+             deadline(None 또는 (마감 시각 time.time(), 최대 stride): 처리량에 맞춰 캐스케이드/stride 조정),
+             frame_source("opencv" 또는 "ffmpeg"), frame_size(원본 (w, h))
+    """
+    stride = options["stride"]
+    infer_size = options.get("infer_size")
+    cascade = options.get("cascade", False)
+
+    metrics = _VideoMetrics(stride, options.get("thresholds"), options.get("window_frames") or 0)
+    profile = metrics.profile = _StageProfiler() if options.get("profile") else None
+    gate = _ReuseGate(*options["reuse"]) if options.get("reuse") else None
+    control = None
+    if options.get("deadline"):
+        deadline, max_stride = options["deadline"]
+        segment_end = end_frame if end_frame is not None else options.get("frame_count", 0)
+        control = _DeadlineController(deadline, stride, max_stride, segment_end, cascade)
+    # 청크 하나 크기의 버퍼를 재사용. 타임라인 저장 시에는 집계한 청크를 timeline_dir에 파일로 내려둠 (메모리 일정)
+    timeline_dir = options.get("timeline_dir")
+    timeline_parts = 0
+    store = _LandmarkStore(_METRICS_CHUNK)
+    cap = None
+    if options.get("frame_source") == "ffmpeg":
+        frames = _iter_frames_ffmpeg(video_path, options, start_frame, end_frame, metrics, control)
+    else:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"❌ 영상 파일을 열 수 없습니다: {video_path}")
+        if start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        slots = options.get("pipeline_slots") or 0
+        if slots > 0:
+            frames = _iter_frames_pipelined(cap, options, start_frame, end_frame, metrics, slots, control)
+        else:
+            frames = _iter_frames(cap, options, start_frame, end_frame, metrics, control)
+    prev_idx = None
+    # 재사용한 프레임은 샘플로 넣지 않고 간격만 다음 추론 프레임의 step에 더함 (이동량이 0인 샘플이 생기지 않도록)
+    carried = 0
+
+    try:
+        with get_graph_pool().checkout() as graphs:
+            if start_frame == 0:
+                # 첫 구간에서만 원본 해상도 대비 절약 시간을 측정하고, 본 분석은 추적 상태를 지운 그래프로 시작
+                metrics.calibration = _calibrate_inference(video_path, graphs, options)
+                graphs.reset()
+            for frame_idx, frame_rgb in frames:
+                metrics.analyzed_frames += 1
+                if on_frame is not None:
+                    on_frame(metrics.total_frames)
+                step = frame_idx - prev_idx if prev_idx is not None else stride
+                prev_idx = frame_idx
+                metrics.stride_frames[step] = metrics.stride_frames.get(step, 0) + 1
+                if control is not None:
+                    cascade = control.cascade
+
+                t0 = time.perf_counter()
+                if gate is not None and gate.check(frame_rgb):
+                    # 직전 추론 결과를 그대로 쓰는 프레임: 지표 샘플은 다음 추론 프레임이 이 간격까지 대표
+                    metrics.reused_frames += 1
+                    metrics.infer_sec += time.perf_counter() - t0
+                    carried += step
+                    if store.size:
+                        store.samples[store.size - 1] += 1
+                    if control is not None:
+                        control.update(frame_idx)
+                    continue
+
+                if cascade:
+                    face_result, pose_result, hands_result = graphs.process_cascade(
+                        frame_rgb, metrics.model_calls, profile
+                    )
+                else:
+                    face_result, pose_result, hands_result = graphs.process(
+                        frame_rgb, metrics.model_calls, profile
+                    )
+                elapsed = time.perf_counter() - t0
+                metrics.infer_sec += elapsed
+
+                t0 = time.perf_counter()
+                # 마지막 샘플은 뒤따르는 재사용 프레임 수를 더해야 하므로 다음 샘플을 넣기 직전에 청크를 집계
+                if store.size >= _METRICS_CHUNK:
+                    metrics.add_store(store)
+                    if timeline_dir:
+                        _spool_timeline_chunk(store, timeline_dir, start_frame, timeline_parts)
+                        timeline_parts += 1
+                    store.clear()
+                store.append(frame_idx, step + carried, face_result, pose_result, hands_result)
+                carried = 0
+                if profile is not None:
+                    profile.add("post", time.perf_counter() - t0)
+                if control is not None:
+                    control.update(frame_idx)
+    finally:
+        frames.close()
+        if cap is not None:
+            cap.release()
+
+    t0 = time.perf_counter()
+    metrics.add_store(store)
+    if timeline_dir and store.size:
+        _spool_timeline_chunk(store, timeline_dir, start_frame, timeline_parts)
+    if profile is not None:
+        profile.add("post", time.perf_counter() - t0)
+    if control is not None:
+        metrics.budget_changes = control.changes
+        metrics.budget_cascade = control.cascade and not options.get("cascade", False)
+    return metrics
+
+
+# 워커 프로세스 전용: 구간별 디코딩 프레임 수 (메인 프로세스가 진행률 계산에 사용)
+_shard_counters = None
+
+
+def _init_shard_worker(counters, cv_threads):
+    global _shard_counters
+    _shard_counters = counters
+    cv2.setNumThreads(cv_threads)
+    # 워커마다 구간 하나씩 처리하므로 그래프 묶음 하나만 미리 준비
+    get_graph_pool(1).warm_up()
+
+
+def _analyze_shard(video_path: str, options: dict, shard_index: int, start_frame: int, end_frame):
+    def on_frame(done_frames: int):
+        _shard_counters[shard_index] = done_frames
+
+    return _analyze_segment(video_path, options, start_frame, end_frame, on_frame)
+
+
+def _shard_bounds(frame_count: int, stride: int, shards: int):
+    """프레임 구간을 stride 배수 경계로 나눕니다. 마지막 구간은 EOF까지 읽습니다."""
+    size = -(-frame_count // shards)
+    size = -(-size // stride) * stride
+    bounds = []
+    start = 0
+    while start < frame_count:
+        end = start + size
+        bounds.append([start, end])
+        start = end
+    bounds[-1][1] = None
+    return bounds
+
+
+def _analyze_sharded(video_path: str, options: dict, frame_count: int, shards: int, report):
+    """영상을 시간 구간으로 나눠 프로세스 풀에서 병렬 분석한 뒤 순서대로 병합합니다."""
+    bounds = _shard_bounds(frame_count, options["stride"], shards)
+    # fork는 MediaPipe 내부 스레드와 충돌할 수 있어 spawn 사용
+    ctx = multiprocessing.get_context("spawn")
+    counters = ctx.Array("q", len(bounds), lock=False)
+
+    with ProcessPoolExecutor(
+        max_workers=len(bounds),
+        mp_context=ctx,
+        initializer=_init_shard_worker,
+        # 워커마다 OpenCV 스레드 풀을 코어 수만큼 만들지 않도록 영상 분석 몫을 나눠 줌
+        initargs=(counters, max(1, get_thread_plan()["vision"]["threads"] // len(bounds))),
+    ) as pool:
+        futures = [
+            pool.submit(_analyze_shard, video_path, options, i, start, end)
+            for i, (start, end) in enumerate(bounds)
+        ]
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=0.5)
+            report(sum(counters))
+        parts = [future.result() for future in futures]
+
+    metrics = parts[0]
+    for part in parts[1:]:
+        metrics.merge(part)
+    return metrics, len(bounds)
+
+
+# ============================
+# 결과 계산 (분석 직후 / 타임라인 재채점 공용)
+# ============================
+def _summarize_metrics(metrics: _VideoMetrics, duration_sec: float, thresholds: dict, fps: float = 0) -> dict:
+    """누적된 지표로 gaze/posture/gesture/hand/head_pose 결과 블록(+ 구간별 시계열 timeline)을 만듭니다."""
+    th = thresholds
+    sampled_frames = metrics.sampled_frames
+
+    gaze_center_ratio = metrics.gaze_center_hits / sampled_frames if sampled_frames > 0 else 0
+    sigma_x = metrics.shoulder_x.std
+    sigma_y = metrics.shoulder_y.std
+    mean_roll = metrics.posture_roll.mean
     posture_stability = max(0, 1 - (sigma_x + sigma_y + abs(mean_roll) / 45))
 
+    left_count, center_count, right_count = metrics.left_count, metrics.center_count, metrics.right_count
     total_gaze_points = left_count + center_count + right_count
     if total_gaze_points > 0:
         gaze_distribution = {
@@ -185,31 +1514,24 @@ def analyze_video(video_path: str):
     else:
         gaze_distribution = {"left": 0, "center": 0, "right": 0}
 
-    gaze_movement_rate = round((gaze_movements / duration_sec), 2) if duration_sec > 0 else 0
+    gaze_movement_rate = round((metrics.gaze_movements / duration_sec), 2) if duration_sec > 0 else 0
+    gaze_trace = metrics.gaze_trace.sample()
 
     # 추가 분석 항목 평균값
-    motion_energy_mean = float(np.mean(motion_energy_values)) if motion_energy_values else 0
-    hand_visibility_ratio = hand_visible_frames / total_frames if total_frames else 0
-    hand_movement_mean = float(np.mean(hand_movement_values)) if hand_movement_values else 0
-    head_roll_mean = float(np.mean(head_rolls)) if head_rolls else 0
-    head_yaw_mean = float(np.mean(head_yaws)) if head_yaws else 0
+    motion_energy_mean = metrics.motion_energy.mean
+    hand_visibility_ratio = metrics.hand_visible_frames / sampled_frames if sampled_frames else 0
+    hand_movement_mean = metrics.hand_movement.mean
+    head_roll_mean = metrics.head_roll.mean
+    head_yaw_mean = metrics.head_yaw.mean
 
     # 평가 기준 (emoji 제거)
-    gesture_eval = "적정" if 0.15 <= motion_energy_mean <= 0.35 else "조정 필요"
-    hand_eval = "균형" if 0.4 <= hand_visibility_ratio <= 0.9 else "부족/과다"
-    head_eval = "안정적" if head_roll_mean < 5 and head_yaw_mean < 15 else "불균형"
+    motion_min, motion_max = th["motion_energy_min"], th["motion_energy_max"]
+    hand_min, hand_max = th["hand_visibility_min"], th["hand_visibility_max"]
+    gesture_eval = "적정" if motion_min <= motion_energy_mean <= motion_max else "조정 필요"
+    hand_eval = "균형" if hand_min <= hand_visibility_ratio <= hand_max else "부족/과다"
+    head_eval = "안정적" if head_roll_mean < th["head_roll_max"] and head_yaw_mean < th["head_yaw_max"] else "불균형"
 
-    # ============================
-    # 결과 구조화
-    # ============================
     results = {
-        "metadata": {
-            "filename": os.path.basename(video_path),
-            "fps": round(fps, 2),
-            "resolution": [width, height],
-            "duration_sec": round(duration_sec, 2),
-            "frame_count": total_frames
-        },
         "gaze": {
             "center_ratio": round(gaze_center_ratio, 3),
             "distribution": gaze_distribution,
@@ -217,7 +1539,7 @@ def analyze_video(video_path: str):
             "trace_sample": gaze_trace[::max(1, len(gaze_trace)//20)],
             "interpretation": (
                 "정면 응시율이 낮으나 청중 중심 발표로 해석 가능"
-                if gaze_center_ratio < 0.15 else
+                if gaze_center_ratio < th["gaze_center_low"] else
                 "정면 응시율이 높아 온라인 프레젠테이션에 적합"
             )
         },
@@ -227,27 +1549,386 @@ def analyze_video(video_path: str):
             "roll_mean": round(mean_roll, 3),
             "interpretation": (
                 "자세 안정성이 높고 상체 균형이 유지됨"
-                if posture_stability > 0.7 else
+                if posture_stability > th["posture_stable"] else
                 "자세 흔들림이 커 보임"
             )
         },
         "gesture": {
             "motion_energy": round(motion_energy_mean, 4),
             "evaluation": gesture_eval,
-            "interpretation": "0.15~0.35면 자연스러운 제스처 빈도 (Mehrabian, 1972)"
+            "interpretation": f"{motion_min:g}~{motion_max:g}면 자연스러운 제스처 빈도 (Mehrabian, 1972)"
         },
         "hand": {
             "visibility_ratio": round(hand_visibility_ratio, 3),
             "movement": round(hand_movement_mean, 4),
             "evaluation": hand_eval,
-            "interpretation": "손동작 비율 40~90%가 이상적 (Pease & Pease, 2006)"
+            "interpretation": f"손동작 비율 {hand_min * 100:g}~{hand_max * 100:g}%가 이상적 (Pease & Pease, 2006)"
         },
         "head_pose": {
             "roll_mean": round(head_roll_mean, 3),
             "yaw_mean": round(head_yaw_mean, 3),
             "evaluation": head_eval,
-            "interpretation": "Roll<5°, Yaw<15°면 시선 분배 안정적"
+            "interpretation": f"Roll<{th['head_roll_max']:g}°, Yaw<{th['head_yaw_max']:g}°면 시선 분배 안정적"
+        }
+    }
+    if metrics.windows is not None:
+        results["timeline"] = metrics.windows.to_dict(fps)
+    return results
+
+
+# ============================
+# 랜드마크 타임라인 저장 / 재채점
+# ============================
+def _spool_timeline_chunk(store: _LandmarkStore, directory, start_frame: int, index: int):
+    """집계가 끝난 랜드마크 청크를 임시 파일로 씁니다. 파일명 순서 = 시간 순서 (구간 시작 프레임, 청크 번호)."""
+    columns = {name: store.view(name) for name in _LandmarkStore._COLUMNS}
+    np.savez(Path(directory) / f"{start_frame:012d}_{index:06d}.npz", **columns)
+
+
+def save_landmark_timeline(parts_dir, path, meta: dict) -> str:
+    """
+    _spool_timeline_chunk로 내려둔 청크들을 압축 npz 하나로 저장합니다. 재채점 시 영상을 다시 디코딩할 필요가 없습니다.
+    컬럼마다 청크를 순서대로 이어 쓰므로 메모리에는 청크 하나만 올라옵니다. (np.load로 그대로 읽을 수 있는 형식)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    parts = sorted(Path(parts_dir).glob("*.npz"))
+    rows = []
+    for part in parts:
+        with np.load(part) as data:
+            rows.append(len(data["frame_index"]))
+    empty = _LandmarkStore(capacity=0)
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        with archive.open("meta.npy", "w") as f:
+            np.lib.format.write_array(f, np.array(json.dumps(meta)))
+        for name in _LandmarkStore._COLUMNS:
+            template = getattr(empty, name)
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+                np.lib.format.write_array_header_1_0(f, {
+                    "descr": np.lib.format.dtype_to_descr(template.dtype),
+                    "fortran_order": False,
+                    "shape": (sum(rows),) + template.shape[1:],
+                })
+                for part in parts:
+                    with np.load(part) as data:
+                        f.write(np.ascontiguousarray(data[name], dtype=template.dtype).tobytes())
+    return str(path)
+
+
+def load_landmark_timeline(path):
+    """save_landmark_timeline으로 저장한 파일을 (_LandmarkStore, meta)로 읽습니다."""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        columns = {name: data[name] for name in _LandmarkStore._COLUMNS}
+    return _LandmarkStore.from_arrays(columns), meta
+
+
+def rescore_timeline(path, thresholds: dict = None) -> dict:
+    """
+    저장된 랜드마크 타임라인으로 gaze/posture/gesture/hand/head_pose 블록을 다시 계산합니다.
+    thresholds로 DEFAULT_THRESHOLDS의 일부 값을 덮어쓸 수 있습니다.
+    """
+    th = _resolve_thresholds(thresholds)
+    store, meta = load_landmark_timeline(path)
+    metrics = _VideoMetrics(meta["frame_stride"], th, meta.get("window_frames", 0))
+    metrics.total_frames = meta["frame_count"]
+    metrics.analyzed_frames = meta["analyzed_frames"]
+    metrics.add_store(store)
+    results = _summarize_metrics(metrics, meta["duration_sec"], th, meta["fps"])
+    results["thresholds"] = th
+    return results
+
+
+def analyze_video(
+    video_path: str,
+    frame_stride: int = None,
+    target_fps: float = None,
+    workers: int = None,
+    max_long_edge: int = None,
+    inference_scale: float = None,
+    pipeline_slots: int = None,
+    cascade: bool = None,
+    timeline_path: str = None,
+    thresholds: dict = None,
+    profile: bool = None,
+    profile_callback=None,
+    reuse_static: bool = None,
+    deadline_sec: float = None,
+    frame_source: str = None,
+):
+    """
+    발표 영상의 시선·자세·몸짓·손동작·머리방향을 분석하는 함수
+    진행률(%) 실시간 업데이트 포함
+
+    frame_stride / target_fps: stride 프레임마다 한 장만 분석합니다(예: target_fps=5).
+    건너뛰는 프레임은 grab()만 하고 색변환·추론은 하지 않습니다.
+    motion_energy·시선 이동량은 stride로 나눠 원본 1프레임 기준으로 정규화하고,
+    비율 지표는 분석한 프레임 수, 초당 지표는 영상 길이 기준으로 계산합니다.
+
+    workers: 2 이상이면 영상을 시간 구간으로 나눠 구간마다 별도 프로세스(자체 FaceMesh/Pose/Hands)로
+    분석 후 병합합니다. 0이면 CPU 코어 수를 사용합니다. 집계 결과는 순차 분석과 같지만
+    MediaPipe 추적 상태가 구간 시작마다 초기화되므로 검출값 자체는 미세하게 다를 수 있습니다.
+
+    max_long_edge / inference_scale: 색변환 전에 프레임을 한 번 축소해 추론합니다.
+    모든 지표는 정규화 좌표 기반이라 해상도와 무관하며, 프레임당 절약 시간은 metadata.inference에 기록됩니다
+    (분석 전 앞부분 프레임을 같은 캐스케이드 설정으로 따로 측정, 측정하지 않으면 calibration이 null이고 이유를 함께 기록).
+
+    pipeline_slots: 1 이상이면 디코더 스레드가 슬롯 수만큼 미리 할당한 프레임 버퍼를 채우고
+    추론 단계가 이를 소비합니다. 단계별 처리량(fps)은 metadata.pipeline에 기록됩니다.
+
+    cascade: Pose를 먼저 추론해 손목이 보일 때만 Hands를, 머리 keypoint 주변 크롭에만 FaceMesh를 실행합니다.
+    모델별 실행 횟수와 건너뛴 비율은 metadata.models에 기록됩니다.
+
+    timeline_path: 지정하면 프레임별 랜드마크 시계열을 압축 npz로 저장합니다.
+    이후 rescore_timeline()으로 영상 재디코딩 없이 임계값만 바꿔 다시 채점할 수 있습니다.
+    thresholds: 평가 임계값(DEFAULT_THRESHOLDS) 중 일부를 덮어씁니다.
+
+    profile: 켜면(기본 VIDEO_PROFILE) 디코딩/색변환/모델별 process()/후처리의 호출당 합계·p50·p95(ms)와
+    단계 단독 처리량(fps)을 metadata.profile에 기록하고, profile_callback(없으면 set_profile_callback으로
+    등록한 함수)을 callback(profile, metadata)로 호출합니다. 끄면 측정 코드를 건너뜁니다.
+
+    reuse_static: 켜면(기본 VIDEO_REUSE_STATIC) 축소 흑백 썸네일의 평균 차이가 VIDEO_REUSE_DIFF 미만인 프레임은
+    추론 없이 직전 랜드마크를 재사용하고, VIDEO_REUSE_MAX_FRAMES번 연속 재사용하면 반드시 다시 추론합니다.
+    재사용 비율은 metadata.reuse에 기록됩니다. 재사용 프레임은 지표 샘플로 넣지 않고 직전 샘플의 가중치(samples)와
+    다음 샘플의 간격(step)에 더합니다. 허용 오차(기본 임계값 기준): 전체 추론 대비 비율 지표(정면 응시율·분포·손 노출·
+    자세 안정성)는 ±0.01, 각도 평균(roll·yaw)은 ±0.2° 이내입니다. 시선 이동은 재사용 구간 직후 분석 간격에서 판정해
+    합성 궤적(재사용 70~80%)에서 전체 추론과 같은 값이었습니다. motion_energy는 재사용 구간 안의 랜드마크 떨림이
+    빠지므로 낮게 나옵니다: 같은 합성 궤적에서 실제 이동이 큰 경우 -20~-30%, 떨림이 대부분인 정지 장면은 최대 -77%
+    (재사용 프레임을 이동량 0인 샘플로 넣으면 각각 -45%, -81%).
+
+    deadline_sec: 분석 시간 예산(초, 기본 VIDEO_DEADLINE_SEC). 지정하면 추론 해상도를 따로 정하지 않은 경우
+    긴 변 VIDEO_DEADLINE_MAX_EDGE로 축소하고, 실측 처리량에 따라 캐스케이드를 켜거나 stride를 두 배씩 늘려
+    (최대 VIDEO_DEADLINE_MAX_GAP_SEC 간격) 예산 안에 끝내도록 조정합니다. 여유가 생기면 stride를 다시 줄입니다.
+    실제 사용한 stride별 프레임 수와 유효 stride, 예산 준수 여부는 metadata.budget에 기록됩니다.
+    stride가 바뀌어도 이동량 지표는 샘플별 간격으로 정규화하며, 비율 지표는 분석 프레임 기준입니다.
+
+    frame_source: "ffmpeg"이면(기본 VIDEO_FRAME_SOURCE) ffmpeg가 stride 샘플링·축소·RGB 변환을 디코더 안에서 처리하고
+    rawvideo 파이프에서 재사용 버퍼로 바로 읽습니다(pipeline_slots는 무시, ffmpeg가 없으면 opencv로 대체).
+    ffprobe가 있으면 프레임 소스와 관계없이 fps/해상도/프레임 수/길이를 ffprobe로 구합니다(VFR 영상 대응).
+
+    지표는 _METRICS_CHUNK 프레임 단위로 집계 후 버퍼를 재사용하므로 긴 영상에서도 메모리가 일정합니다.
+    결과의 timeline에는 VIDEO_WINDOW_SEC 구간별 정면 응시율/motion energy/머리 yaw/손 노출 비율이 담깁니다.
+
+    MediaPipe 그래프는 프로세스별 풀(VIDEO_GRAPH_POOL_SIZE)에서 빌려 쓰고 반납 시 reset하므로,
+    동시에 풀 크기보다 많은 분석이 요청되면 그래프가 반납될 때까지 대기합니다.
+    """
+
+    probe = _probe_video(video_path)
+    if probe is not None:
+        fps, width, height = probe["fps"], probe["width"], probe["height"]
+        frame_count, duration_sec = probe["frame_count"], probe["duration_sec"]
+    else:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"❌ 영상 파일을 열 수 없습니다: {video_path}")
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        duration_sec = frame_count / fps if fps > 0 else 0
+
+    if frame_source is None:
+        frame_source = VIDEO_FRAME_SOURCE
+    if frame_source == "ffmpeg" and _find_binary("ffmpeg") is None:
+        print("⚠️ ffmpeg를 찾을 수 없어 OpenCV 프레임 소스를 사용합니다.")
+        frame_source = "opencv"
+    if frame_source == "ffmpeg":
+        pipeline_slots = 0
+    stride = _resolve_frame_stride(fps, frame_stride, target_fps)
+    infer_size = _resolve_inference_size(width, height, max_long_edge, inference_scale)
+    if pipeline_slots is None:
+        pipeline_slots = VIDEO_PIPELINE_SLOTS
+    if cascade is None:
+        cascade = VIDEO_CASCADE
+    thresholds = _resolve_thresholds(thresholds)
+    if profile is None:
+        profile = VIDEO_PROFILE
+    if reuse_static is None:
+        reuse_static = VIDEO_REUSE_STATIC
+    if deadline_sec is None:
+        deadline_sec = VIDEO_DEADLINE_SEC
+    deadline = None
+    if deadline_sec and deadline_sec > 0:
+        if infer_size is None:
+            infer_size = _resolve_inference_size(width, height, VIDEO_DEADLINE_MAX_EDGE, 0)
+        max_stride = int(fps * VIDEO_DEADLINE_MAX_GAP_SEC) if fps > 0 else stride
+        deadline = (time.time() + deadline_sec * (1 - _DEADLINE_RESERVE), max_stride)
+    options = {
+        "stride": stride,
+        "infer_size": infer_size,
+        "pipeline_slots": max(0, pipeline_slots),
+        "cascade": bool(cascade),
+        "thresholds": thresholds,
+        "profile": bool(profile),
+        "reuse": (VIDEO_REUSE_DIFF, max(1, VIDEO_REUSE_MAX_FRAMES)) if reuse_static else None,
+        "deadline": deadline,
+        "frame_count": frame_count,
+        "constant_rate": probe["constant_rate"] if probe is not None else 0.0,
+        "frame_source": frame_source,
+        "frame_size": (width, height),
+        "window_frames": max(1, int(round(fps * VIDEO_WINDOW_SEC))) if fps > 0 and VIDEO_WINDOW_SEC > 0 else 0,
+    }
+
+    if workers is None:
+        workers = VIDEO_ANALYSIS_WORKERS
+    if workers <= 0:
+        # 동시에 도는 STT와 코어를 나누도록 스레드 계획의 영상 분석 몫만 사용
+        workers = get_thread_plan()["vision"]["threads"]
+    # 구간 분할은 전체 프레임 수를 알아야 가능
+    max_shards = int(frame_count // (fps * VIDEO_MIN_SHARD_SEC)) if fps > 0 else 0
+    shards = max(1, min(workers, max_shards))
+
+    print(f"🎥 분석 시작: {video_path} (stride={stride}, workers={shards})")
+    start_time = time.time()
+    report = _make_progress_reporter(frame_count, start_time)
+
+    # 타임라인 청크를 내려둘 임시 디렉터리 (구간 워커 프로세스도 같은 경로에 씀)
+    timeline_dir = None
+    if timeline_path:
+        Path(timeline_path).parent.mkdir(parents=True, exist_ok=True)
+        timeline_dir = tempfile.mkdtemp(prefix=".timeline_", dir=Path(timeline_path).parent)
+        options["timeline_dir"] = timeline_dir
+
+    # ============================
+    # 프레임 단위 분석
+    # ============================
+    try:
+        if shards > 1:
+            metrics, shards = _analyze_sharded(video_path, options, frame_count, shards, report)
+        else:
+            metrics = _analyze_segment(video_path, options, on_frame=report)
+    except BaseException:
+        if timeline_dir:
+            shutil.rmtree(timeline_dir, ignore_errors=True)
+        raise
+
+    print("\n✅ 영상 분석 완료!\n")
+    set_progress(100)
+
+    total_frames = metrics.total_frames
+    analyzed_frames = metrics.analyzed_frames
+
+    # CAP_PROP_FRAME_COUNT를 얻지 못한 경우 실제 디코딩한 프레임 수로 길이 계산
+    if duration_sec <= 0 and fps > 0:
+        duration_sec = total_frames / fps
+
+    # 추론 해상도 및 프레임당 추론 시간 (축소 시 원본 대비 절약 시간)
+    inference_info = {
+        "resolution": list(infer_size) if infer_size else [width, height],
+        "scale": round(infer_size[0] / width, 3) if infer_size else 1.0,
+        "per_frame_ms": (
+            round(1000 * (metrics.prepare_sec + metrics.infer_sec) / analyzed_frames, 2)
+            if analyzed_frames else 0
+        ),
+    }
+    calib = metrics.calibration or {"skipped": "측정하지 않음"}
+    if "skipped" in calib:
+        inference_info.update({"calibration": None, "calibration_skipped": calib["skipped"]})
+    else:
+        inference_info.update({
+            "full_res_per_frame_ms": round(calib["full_ms"], 2),
+            "saved_ms_per_frame": round(calib["full_ms"] - calib["reduced_ms"], 2),
+            "calibration": {
+                "frames": calib["frames"],
+                "cascade": calib["cascade"],
+                "reduced_ms": round(calib["reduced_ms"], 2),
+                "full_ms": round(calib["full_ms"], 2),
+            },
+        })
+
+    # 단계별 처리량 (각 단계가 실제로 일한 시간 기준 fps)
+    def _stage_fps(frames, seconds):
+        return round(frames / seconds, 1) if seconds > 0 else 0
+
+    pipeline_info = {
+        "ring_slots": options["pipeline_slots"],
+        "stage_fps": {
+            "decode": _stage_fps(total_frames, metrics.decode_sec),
+            "prepare": _stage_fps(analyzed_frames, metrics.prepare_sec),
+            "infer": _stage_fps(analyzed_frames, metrics.infer_sec),
+        },
+        "decode_wait_sec": round(metrics.decode_wait_sec, 2),
+        "infer_wait_sec": round(metrics.infer_wait_sec, 2),
+        "wall_fps": _stage_fps(analyzed_frames, time.time() - start_time),
+    }
+
+    # 모델별 실행 횟수 및 건너뛴 비율
+    calls = metrics.model_calls
+    models_info = {
+        "cascade": options["cascade"],
+        "invocations": {"face_mesh": calls["face"], "pose": calls["pose"], "hands": calls["hands"]},
+        "skip_ratio": {
+            name: round(1 - calls[key] / analyzed_frames, 3) if analyzed_frames else 0
+            for name, key in (("face_mesh", "face"), ("pose", "pose"), ("hands", "hands"))
+        },
+        "face_crop_ratio": round(calls["face_crop"] / calls["face"], 3) if calls["face"] else 0,
+    }
+
+    # 정적 장면 랜드마크 재사용
+    reuse_info = {
+        "enabled": bool(reuse_static),
+        "reused_frames": metrics.reused_frames,
+        "ratio": round(metrics.reused_frames / analyzed_frames, 3) if analyzed_frames else 0,
+    }
+    if reuse_static:
+        reuse_info.update({"diff_threshold": VIDEO_REUSE_DIFF, "max_interval": options["reuse"][1]})
+
+    # 마감 시간 예산 모드에서 실제로 사용한 샘플링
+    budget_info = None
+    if deadline is not None:
+        elapsed = time.time() - start_time
+        budget_info = {
+            "deadline_sec": deadline_sec,
+            "elapsed_sec": round(elapsed, 2),
+            "met": elapsed <= deadline_sec,
+            "effective_stride": round(total_frames / analyzed_frames, 2) if analyzed_frames else 0,
+            "effective_fps": round(analyzed_frames / duration_sec, 2) if duration_sec > 0 else 0,
+            "stride_frames": {str(k): v for k, v in sorted(metrics.stride_frames.items())},
+            "max_stride": deadline[1],
+            "cascade_enabled": metrics.budget_cascade,
+            "adjustments": metrics.budget_changes,
         }
+
+    # ============================
+    # 결과 구조화
+    # ============================
+    metadata = {
+        "filename": os.path.basename(video_path),
+        "fps": round(fps, 2),
+        "resolution": [width, height],
+        "duration_sec": round(duration_sec, 2),
+        "frame_count": total_frames,
+        "analyzed_frames": analyzed_frames,
+        "frame_stride": stride,
+        "analysis_fps": round(fps / stride, 2) if fps > 0 else 0,
+        "workers": shards,
+        "frame_source": frame_source,
+        "probe": "ffprobe" if probe is not None else "opencv",
+        "inference": inference_info,
+        "pipeline": pipeline_info,
+        "models": models_info,
+        "reuse": reuse_info,
     }
+    if budget_info is not None:
+        metadata["budget"] = budget_info
+    if metrics.profile is not None:
+        metadata["profile"] = dict(metrics.profile.to_dict(), wall_sec=round(time.time() - start_time, 3))
+        callback = profile_callback or _profile_callback
+        if callback is not None:
+            try:
+                callback(metadata["profile"], metadata)
+            except Exception as e:
+                print(f"⚠️ 프로파일 콜백 실패: {e}")
+    if timeline_path:
+        timeline_meta = dict(metadata, fps=fps, duration_sec=duration_sec, window_frames=options["window_frames"])
+        try:
+            metadata["timeline_file"] = save_landmark_timeline(timeline_dir, timeline_path, timeline_meta)
+        finally:
+            shutil.rmtree(timeline_dir, ignore_errors=True)
 
+    results = {"metadata": metadata}
+    results.update(_summarize_metrics(metrics, duration_sec, thresholds, fps))
     return results
@@ -19,6 +19,20 @@ interface ResultsPageProps {
   onNavigate: (page: Page) => void;
 }
 
+// 저장된 STT 결과는 단어 타임스탬프를 열 지향(word_timeline)으로 담으므로 words 배열로 복원
+function expandWords(stt: any): any[] | undefined {
+  if (Array.isArray(stt.words)) return stt.words;
+  const timeline = stt.word_timeline;
+  if (!timeline || !Array.isArray(timeline.text_idx)) return undefined;
+  const vocab = timeline.vocab || [];
+  return timeline.text_idx.map((idx: number, i: number) => ({
+    word: vocab[idx] ?? "",
+    start: timeline.start?.[i] ?? null,
+    end: timeline.end?.[i] ?? null,
+    probability: timeline.probability?.[i] ?? null,
+  }));
+}
+
 // =============================
 // 🔧 normalizeData (UI 변경 X)
 // =============================
@@ -53,7 +67,8 @@ function normalizeData(raw: any) {
     0;
   const duration = Math.round(durationSec || 0);
 
-  const pauseEvents = (voiceSource.pause_events ?? stt.pause_events ?? stt.words) || [];
+  const words = expandWords(stt);
+  const pauseEvents = (voiceSource.pause_events ?? stt.pause_events ?? words) || [];
 
   const wordCount = toNumber(stt.word_count);
 
@@ -64,7 +79,7 @@ function normalizeData(raw: any) {
     (typeof wordCount === "number" && durationSec
       ? Math.round((wordCount / durationSec) * 60)
       : undefined) ??
-    (Array.isArray(stt.words) && durationSec ? Math.round((stt.words.length / durationSec) * 60) : undefined);
+    (Array.isArray(words) && durationSec ? Math.round((words.length / durationSec) * 60) : undefined);
 
   const logicBlock = normalized.analysis?.logic || stt.logic || normalized.logic || {};
   const resolvedLogicSimilarity =